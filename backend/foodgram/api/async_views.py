@@ -0,0 +1,69 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+
+from api import views
+
+
+def _call(func, *args, **kwargs):
+    # Потоки пула не получают request_finished: постоянные соединения
+    # закрываются, если сломаны или устарели по CONN_MAX_AGE,
+    # а при CONN_MAX_AGE = 0 — сразу после вызова.
+    for connection in connections.all():
+        if connection.settings_dict['CONN_MAX_AGE']:
+            connection.close_if_unusable_or_obsolete()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        for connection in connections.all():
+            if not connection.settings_dict['CONN_MAX_AGE']:
+                connection.close()
+
+
+async def database(func, *args, **kwargs):
+    """
+    Синхронный вызов ORM в потоке пула. Каждый поток работает со своим
+    соединением, поэтому вызовы выполняются параллельно, а число
+    соединений ограничено размером пула.
+    """
+    return await sync_to_async(_call, thread_sensitive=False)(
+        func, *args, **kwargs
+    )
+
+
+def async_view(view):
+    """
+    Асинхронная обертка над представлением DRF для ASGI. Представление
+    выполняется в потоке пула, а не в общем потоке синхронного кода,
+    поэтому запросы обслуживаются параллельно.
+    Аутентификация, права доступа, троттлинг, обработка исключений,
+    кэш и ETag остаются за представлением.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await database(view, request, *args, **kwargs)
+
+    return wrapper
+
+
+recipe_list_view = async_view(
+    views.RecipeViewSet.as_view({'get': 'list', 'post': 'create'})
+)
+recipe_detail_view = async_view(
+    views.RecipeViewSet.as_view({
+        'get': 'retrieve', 'put': 'update', 'patch': 'partial_update',
+        'delete': 'destroy'
+    })
+)
+tag_list_view = async_view(views.TagsViewSet.as_view({'get': 'list'}))
+tag_detail_view = async_view(
+    views.TagsViewSet.as_view({'get': 'retrieve'})
+)
+ingredient_list_view = async_view(
+    views.IngredientViewSet.as_view({'get': 'list'})
+)
+ingredient_detail_view = async_view(
+    views.IngredientViewSet.as_view({'get': 'retrieve'})
+)
+subscription_list_view = async_view(views.subscriptions_list)
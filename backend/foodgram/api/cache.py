@@ -0,0 +1,131 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import urlencode
+from rest_framework.response import Response
+
+from api.replicas import cache_timeout
+
+GENERATION_KEY = 'api:generation:{}'
+
+
+def get_generations(entities):
+    """
+    Текущие поколения сущностей. Отсутствующий счетчик создается
+    со значением текущего времени, чтобы после вытеснения из кэша
+    он не совпал с одним из прежних значений.
+    """
+    keys = [GENERATION_KEY.format(entity) for entity in entities]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time.time_ns(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(entity):
+    key = GENERATION_KEY.format(entity)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def viewer_entity(user_id):
+    """
+    Сущность с избранным, списком покупок и подписками пользователя.
+    """
+    return f'viewer:{user_id}'
+
+
+def normalized_query(request):
+    """
+    Строка запроса с упорядоченными параметрами и значениями.
+    """
+    return urlencode(sorted(
+        (key, sorted(values))
+        for key, values in request.query_params.lists()
+    ), doseq=True)
+
+
+def response_cache_key(basename, request, entities, version=None):
+    """
+    Ключ кэша ответа: поколения сущностей entities, дополнительная
+    версия данных и нормализованный адрес запроса.
+    """
+    query = normalized_query(request)
+    generations = get_generations(entities)
+    if version is not None:
+        generations.append(version)
+    generations = ':'.join(str(generation) for generation in generations)
+    digest = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+    return f'api:response:{basename}:{generations}:{digest}'
+
+
+def cached_first_page(request, entities, handler, timeout):
+    """
+    Кэширует первую страницу персональной выдачи пользователя.
+    Следующие страницы (с параметром cursor) не кэшируются.
+    """
+    if 'cursor' in request.query_params:
+        return handler()
+    generations = ':'.join(
+        str(generation) for generation in get_generations(entities)
+    )
+    digest = hashlib.md5(normalized_query(request).encode()).hexdigest()
+    key = (
+        f'api:page:{request.path}:{request.user.pk}:{generations}:{digest}'
+    )
+    data = cache.get(key)
+    if data is not None:
+        return Response(data)
+    response = handler()
+    if response.status_code == 200:
+        cache.set(key, response.data, cache_timeout(timeout))
+    return response
+
+
+class AnonymousCacheMixin:
+    """
+    Кэширует данные ответов list/retrieve для анонимных пользователей.
+    Ключ включает поколения сущностей из cache_entities, поэтому
+    изменение любой из них делает старые записи недостижимыми.
+    """
+    cache_entities = ()
+
+    def get_cache_version(self, request):
+        """
+        Версия данных, которые меняются без сигналов моделей,
+        None — без версии.
+        """
+
+    def get_cache_key(self, request):
+        return response_cache_key(
+            self.basename, request, self.cache_entities,
+            self.get_cache_version(request)
+        )
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return handler(request, *args, **kwargs)
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(
+                key, response.data, cache_timeout(settings.API_CACHE_TIMEOUT)
+            )
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, super().retrieve, *args, **kwargs
+        )
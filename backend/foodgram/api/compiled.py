@@ -0,0 +1,155 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Manager, Model, QuerySet
+from rest_framework import serializers
+
+from recipes.images import image_rendition_urls
+from recipes.models import IngredientRecipe, TagRecipe
+
+TAG_FIELDS = ('id', 'name', 'color', 'slug')
+INGREDIENT_FIELDS = ('id', 'name', 'measurement_unit')
+USER_FIELDS = ('id', 'email', 'username', 'first_name', 'last_name')
+RECIPE_FIELDS = (
+    'id', 'name', 'image', 'renditions_ready', 'text', 'cooking_time',
+    'pub_date', 'author_id', 'author__email', 'author__username',
+    'author__first_name', 'author__last_name'
+)
+USER_FLAGS = ('is_favorited', 'is_in_shopping_cart', 'is_subscribed')
+
+
+def value(row, name):
+    if isinstance(row, dict):
+        return row[name]
+    return getattr(row, name)
+
+
+def viewer_flag(row, name, state, ids, key='id'):
+    """
+    Флаг пользователя из аннотации queryset, если она есть,
+    иначе проверка по множеству ids из ViewerState.
+    """
+    if isinstance(row, dict):
+        if name in row:
+            return row[name]
+    elif hasattr(row, name):
+        return getattr(row, name)
+    return value(row, key) in getattr(state, ids)
+
+
+def annotated_values(queryset, fields, annotations):
+    return queryset.values(*fields, *(
+        name for name in annotations if name in queryset.query.annotations
+    ))
+
+
+def recipe_rows(queryset):
+    """
+    Строки .values() для ShowRecipeSerializer в режиме compiled,
+    без API_COMPILED_SERIALIZERS queryset возвращается как есть.
+    """
+    if not settings.API_COMPILED_SERIALIZERS:
+        return queryset
+    return annotated_values(
+        queryset.prefetch_related(None), RECIPE_FIELDS, USER_FLAGS
+    )
+
+
+def recipe_tags(recipe_ids):
+    """
+    Теги рецептов одним запросом в порядке prefetch_related('tags').
+    """
+    tags = defaultdict(list)
+    if recipe_ids:
+        for recipe_id, *tag in TagRecipe.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('tag__name').values_list(
+            'recipe_id', *(f'tag__{field}' for field in TAG_FIELDS)
+        ):
+            tags[recipe_id].append(dict(zip(TAG_FIELDS, tag)))
+    return tags
+
+
+def recipe_ingredients(recipe_ids):
+    """
+    Ингредиенты рецептов одним запросом той же формы, что и prefetch
+    в RecipeQuerySet.with_related.
+    """
+    ingredients = defaultdict(list)
+    fields = (*INGREDIENT_FIELDS, 'amount')
+    if recipe_ids:
+        for recipe_id, *ingredient in IngredientRecipe.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', *(
+            f'ingredient__{field}' for field in INGREDIENT_FIELDS
+        ), 'amount'):
+            ingredients[recipe_id].append(dict(zip(fields, ingredient)))
+    return ingredients
+
+
+def recipe_images(row, request):
+    """
+    URL оригинального изображения, как у ImageField, и URL всех
+    уменьшенных копий, как у поля renditions.
+    """
+    def absolute(url):
+        if request is None:
+            return url
+        return request.build_absolute_uri(url)
+
+    if not row['image']:
+        return None, None
+    image = absolute(default_storage.url(row['image']))
+    if not row['renditions_ready']:
+        return image, None
+    return image, {
+        name: {extension: absolute(url) for extension, url in formats.items()}
+        for name, formats in image_rendition_urls(row['image']).items()
+    }
+
+
+class CompiledListSerializer(serializers.ListSerializer):
+    """
+    Список в режиме compiled (настройка API_COMPILED_SERIALIZERS):
+    элементы собирает метод compile дочернего сериализатора.
+    """
+    def to_representation(self, data):
+        if settings.API_COMPILED_SERIALIZERS:
+            rows = self.child.compiled_rows(data)
+            if rows is not None:
+                return self.child.compile(rows)
+        return super().to_representation(data)
+
+
+class CompiledSerializerMixin:
+    """
+    Режим чтения без объектов Field: представление строится
+    из строк .values() или уже загруженных объектов по списку
+    compiled_fields, аннотации compiled_annotations берутся из queryset.
+    """
+    compiled_fields = ()
+    compiled_annotations = ()
+
+    def compiled_rows(self, data):
+        if isinstance(data, Manager):
+            data = data.all()
+        if isinstance(data, QuerySet) and data._result_cache is None:
+            return annotated_values(
+                data, self.compiled_fields, self.compiled_annotations
+            )
+        return data
+
+    def compile(self, rows):
+        return [self.compile_row(row) for row in rows]
+
+    def compile_row(self, row):
+        return {name: value(row, name) for name in self.compiled_fields}
+
+    def compilable(self, instance):
+        return isinstance(instance, Model)
+
+    def to_representation(self, instance):
+        if settings.API_COMPILED_SERIALIZERS and self.compilable(instance):
+            return self.compile([instance])[0]
+        return super().to_representation(instance)
@@ -0,0 +1,76 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from api.cache import get_generations, normalized_query, viewer_entity
+from recipes.models import Recipe
+from recipes.scores import SCORE_ORDERINGS, scores_watermark
+
+RECIPE_ENTITIES = ('recipe', 'tag', 'ingredient', 'user')
+RELATED_ENTITIES = ('tag', 'ingredient', 'user')
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def recipe_list_etag(request):
+    """
+    ETag страницы рецептов без запросов к рецептам: по поколениям
+    кэша рецептов, связанных сущностей и данных пользователя.
+    Поколения меняются и при удалении рецептов, и при изменении тегов,
+    ингредиентов и авторов. При сортировке по рейтингу учитывается
+    время его расчета.
+    """
+    entities = list(RECIPE_ENTITIES)
+    if not request.user.is_anonymous:
+        entities.append(viewer_entity(request.user.pk))
+    scored_at = None
+    if request.query_params.get('ordering') in SCORE_ORDERINGS:
+        scored_at = scores_watermark()
+    return make_etag(
+        get_generations(entities), scored_at, normalized_query(request)
+    )
+
+
+def recipe_etag(pk, request):
+    if not str(pk).isdigit():
+        return None
+    pk = int(pk)
+    state = Recipe.objects.filter(pk=pk).with_user_flags(
+        request.user
+    ).values_list(
+        'updated_at', 'is_favorited', 'is_in_shopping_cart', 'is_subscribed',
+        'renditions_ready'
+    ).first()
+    if state is None:
+        return None
+    return make_etag(pk, *state, get_generations(RELATED_ENTITIES))
+
+
+def not_modified(request, etag):
+    """
+    Ответ 304 Not Modified при совпадении ETag или None.
+    Last-Modified не отдается и If-Modified-Since не проверяется:
+    время изменения не отражает удаления рецептов и изменения
+    связанных тегов, ингредиентов и авторов.
+    """
+    return get_conditional_response(request, etag=etag)
+
+
+def add_etag(response, etag):
+    if etag and response.status_code in (200, 304):
+        response['ETag'] = etag
+    return response
+
+
+def conditional_response(request, etag, handler, *args, **kwargs):
+    """
+    Отдает 304 Not Modified при совпадении ETag, иначе вызывает
+    обработчик и добавляет ETag к ответу.
+    """
+    response = not_modified(request, etag)
+    if response is None:
+        response = handler(request, *args, **kwargs)
+    return add_etag(response, etag)
@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.core.checks import Error, Info, Warning, register
+from django.core.signals import request_started
+from django.db import connections
+from django.dispatch import receiver
+
+POOLERS = ('', 'pgbouncer')
+REPLICA_SELECTIONS = ('round_robin', 'least_lag')
+
+
+@receiver(request_started)
+def check_connections(**kwargs):
+    """
+    Проверка постоянных соединений перед запросом (CONN_HEALTH_CHECKS,
+    как в Django 4.1): соединение, разорванное базой или пулером,
+    закрывается и открывается заново при первом обращении к базе.
+    """
+    for connection in connections.all():
+        if (connection.settings_dict.get('CONN_HEALTH_CHECKS')
+                and connection.connection is not None
+                and not connection.is_usable()):
+            connection.close()
+
+
+def describe(alias, config):
+    max_age = config['CONN_MAX_AGE']
+    if max_age is None:
+        lifetime = 'без ограничения'
+    elif max_age:
+        lifetime = f'{max_age} с'
+    else:
+        lifetime = 'закрываются после запроса'
+    parts = [
+        f'{alias}: {config["ENGINE"].rsplit(".", 1)[-1]} '
+        f'{config["HOST"] or "локально"}',
+        f'постоянные соединения: {lifetime}',
+        'проверка перед запросом: '
+        f'{"да" if config.get("CONN_HEALTH_CHECKS") else "нет"}',
+        'серверные курсоры: '
+        f'{"нет" if config["DISABLE_SERVER_SIDE_CURSORS"] else "да"}',
+    ]
+    if 'postgresql' in config['ENGINE']:
+        parts.append(f'пулер: {settings.DB_POOLER or "нет"}')
+        timeout = settings.DB_STATEMENT_TIMEOUT
+        parts.append(
+            f'statement_timeout: {f"{timeout} мс" if timeout else "нет"}'
+        )
+    return ', '.join(parts)
+
+
+@register()
+def connection_settings(app_configs, **kwargs):
+    """
+    Действующие настройки соединений с базой при запуске (без DEBUG)
+    и предупреждения о сочетаниях, несовместимых с пулером.
+    """
+    messages = []
+    if settings.DB_POOLER not in POOLERS:
+        messages.append(Error(
+            f'Неизвестный DB_POOLER: {settings.DB_POOLER}',
+            hint=f'Допустимые значения: {", ".join(filter(None, POOLERS))}',
+            id='api.E001',
+        ))
+    if settings.DB_REPLICA_SELECTION not in REPLICA_SELECTIONS:
+        messages.append(Error(
+            f'Неизвестный DB_REPLICA_SELECTION: '
+            f'{settings.DB_REPLICA_SELECTION}',
+            hint=f'Допустимые значения: {", ".join(REPLICA_SELECTIONS)}',
+            id='api.E002',
+        ))
+    for alias in connections:
+        config = connections.databases[alias]
+        if not settings.DEBUG:
+            messages.append(Info(describe(alias, config), id='api.I001'))
+        if config['CONN_MAX_AGE'] != 0 and not config.get(
+            'CONN_HEALTH_CHECKS'
+        ):
+            messages.append(Warning(
+                f'{alias}: постоянные соединения без проверки перед '
+                'запросом, разорванное соединение вернет ошибку',
+                hint='Включите DB_CONN_HEALTH_CHECKS=True',
+                id='api.W001',
+            ))
+        if settings.DB_POOLER != 'pgbouncer':
+            continue
+        if not config['DISABLE_SERVER_SIDE_CURSORS']:
+            messages.append(Warning(
+                f'{alias}: серверные курсоры не работают через PgBouncer '
+                'в режиме transaction',
+                hint='Включите DB_DISABLE_SERVER_SIDE_CURSORS=True',
+                id='api.W002',
+            ))
+        if settings.DB_STATEMENT_TIMEOUT:
+            messages.append(Warning(
+                f'{alias}: PgBouncer не передает параметр options, '
+                'DB_STATEMENT_TIMEOUT не применяется',
+                hint=(
+                    'Задайте ALTER ROLE ... SET statement_timeout = '
+                    f'{settings.DB_STATEMENT_TIMEOUT}'
+                ),
+                id='api.W003',
+            ))
+    return messages
@@ -0,0 +1,163 @@
+import csv
+
+from django.db.models import Sum
+
+from recipes.models import IngredientRecipe
+
+CYRILLIC = 'АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ'
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+FONT_SIZE = 12
+LEADING = 16
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+
+
+def shopping_list(user):
+    """
+    Суммирует ингредиенты всех рецептов из списка покупок на стороне
+    базы данных.
+    """
+    return IngredientRecipe.objects.filter(
+        recipe__shoppingcart__user=user
+    ).values(
+        'ingredient__name', 'ingredient__measurement_unit'
+    ).annotate(
+        amount=Sum('amount')
+    ).order_by('ingredient__name')
+
+
+def text_lines(rows):
+    yield 'Список покупок:\n'
+    for count, row in enumerate(rows, start=1):
+        yield (
+            f"Позиция №{count}: {row['ingredient__name']} - "
+            f"{row['amount']} {row['ingredient__measurement_unit']}\n"
+        )
+
+
+class Echo:
+    """
+    Буфер для csv.writer, который сразу возвращает записанную строку.
+    """
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('Ингредиент', 'Количество', 'Единица измерения'))
+    for row in rows:
+        yield writer.writerow((
+            row['ingredient__name'],
+            row['amount'],
+            row['ingredient__measurement_unit']
+        ))
+
+
+def _glyph_differences():
+    """
+    Имена глифов кириллицы для кодов cp1251, чтобы стандартный
+    шрифт Helvetica выводил русский текст без встраивания шрифта.
+    """
+    upper = [f'/afii{10017 + position}' for position in range(33)]
+    lower = [f'/afii{10065 + position}' for position in range(33)]
+    yo = CYRILLIC.index('Ё')
+    return ' '.join([
+        '168', upper[yo], '184', lower[yo], '185 /afii61352', '192',
+        *upper[:yo], *upper[yo + 1:], *lower[:yo], *lower[yo + 1:]
+    ])
+
+
+def _pdf_string(line):
+    data = line.rstrip('\n').encode('cp1251', 'replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(
+        b')', b'\\)'
+    )
+
+
+def pdf_chunks(lines):
+    """
+    Пишет PDF постранично: каждая страница отдается клиенту сразу после
+    заполнения, в памяти хранятся только смещения объектов для xref.
+    """
+    offsets = {}
+    position = 0
+    page_ids = []
+
+    def emit(number, body):
+        nonlocal position
+        offsets[number] = position
+        chunk = b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        position += len(chunk)
+        return chunk
+
+    def page(number, page_lines):
+        content = b'BT /F1 %d Tf %d TL %d %d Td\n' % (
+            FONT_SIZE, LEADING, MARGIN, PAGE_HEIGHT - MARGIN
+        ) + b''.join(
+            b'(' + _pdf_string(line) + b") '\n" for line in page_lines
+        ) + b'ET'
+        page_ids.append(number + 1)
+        return emit(
+            number,
+            b'<< /Length %d >>\nstream\n' % len(content)
+            + content + b'\nendstream'
+        ) + emit(
+            number + 1,
+            b'<< /Type /Page /Parent 2 0 R /Contents %d 0 R >>' % number
+        )
+
+    header = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    position = len(header)
+    yield header
+    yield emit(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+    yield emit(3, (
+        '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica '
+        '/Encoding << /Type /Encoding /BaseEncoding /WinAnsiEncoding '
+        f'/Differences [{_glyph_differences()}] >> >>'
+    ).encode())
+    number = 4
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) == LINES_PER_PAGE:
+            yield page(number, buffer)
+            number += 2
+            buffer = []
+    if buffer or not page_ids:
+        yield page(number, buffer)
+        number += 2
+    yield emit(2, (
+        '<< /Type /Pages /Kids [%s] /Count %d '
+        '/Resources << /Font << /F1 3 0 R >> >> '
+        '/MediaBox [0 0 %d %d] >>' % (
+            ' '.join(f'{page_id} 0 R' for page_id in page_ids),
+            len(page_ids), PAGE_WIDTH, PAGE_HEIGHT
+        )
+    ).encode())
+    xref = [b'xref\n0 %d\n' % number, b'0000000000 65535 f \n']
+    xref.extend(b'%010d 00000 n \n' % offsets[obj] for obj in range(1, number))
+    yield b''.join(xref) + (
+        b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+        % (number, position)
+    )
+
+
+def txt_export(rows):
+    return (line.encode() for line in text_lines(rows))
+
+
+def csv_export(rows):
+    return (line.encode() for line in csv_lines(rows))
+
+
+def pdf_export(rows):
+    return pdf_chunks(text_lines(rows))
+
+
+EXPORTS = {
+    'txt': ('text/plain; charset=utf-8', txt_export),
+    'csv': ('text/csv; charset=utf-8', csv_export),
+    'pdf': ('application/pdf', pdf_export),
+}
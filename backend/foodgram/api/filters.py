@@ -2,12 +2,21 @@ from django_filters import rest_framework as filter
 from rest_framework.filters import SearchFilter
 
 from recipes.models import Recipe, Tag
+from recipes.scores import SCORE_ORDERINGS, order_by_score
+from recipes.search import match_ingredients, search_recipes
+
+
+class NumberInFilter(filter.BaseInFilter, filter.NumberFilter):
+    pass
 
 
 class RecipeFilter(filter.FilterSet):
     """
     Кастомный фильтр связанных моделяй, чтобы фильтрация не
     использовала первичный ключ.
+    Порядок выдачи: ordering заменяет любой другой порядок, иначе
+    с ingredients рецепты упорядочены по совпадению ингредиентов
+    и затем по релевантности search, с одним search — по релевантности.
     """
     tags = filter.ModelMultipleChoiceFilter(
         field_name='tags__slug',
@@ -21,10 +30,26 @@ class RecipeFilter(filter.FilterSet):
     is_in_shopping_cart = filter.BooleanFilter(
         field_name='is_in_shopping_cart', method='filter_is_in_shopping_cart'
     )
+    search = filter.CharFilter(method='filter_search')
+    ingredients = NumberInFilter(method='filter_ingredients')
+    match = filter.ChoiceFilter(
+        choices=(('all', 'all'), ('any', 'any'), ('ratio', 'ratio')),
+        method='filter_ingredients_option'
+    )
+    min_ratio = filter.NumberFilter(
+        min_value=0, max_value=1, method='filter_ingredients_option'
+    )
+    ordering = filter.ChoiceFilter(
+        choices=[(ordering, ordering) for ordering in SCORE_ORDERINGS],
+        method='filter_ordering'
+    )
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'tags', 'is_favorited', 'is_in_shopping_cart', 'search',
+            'ingredients', 'match', 'min_ratio', 'ordering'
+        )
 
     def filter_is_favorited(self, queryset, name, value):
         if value:
@@ -36,6 +61,27 @@ class RecipeFilter(filter.FilterSet):
             return queryset.filter(shoppingcart__user=self.request.user)
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def filter_ingredients(self, queryset, name, value):
+        options = {'mode': self.form.cleaned_data.get('match') or 'any'}
+        if self.form.cleaned_data.get('min_ratio') is not None:
+            options['min_ratio'] = self.form.cleaned_data['min_ratio']
+        return match_ingredients(
+            queryset, [int(ingredient) for ingredient in value], **options
+        )
+
+    def filter_ingredients_option(self, queryset, name, value):
+        """
+        match и min_ratio — параметры фильтра ingredients,
+        их применяет filter_ingredients.
+        """
+        return queryset
+
+    def filter_ordering(self, queryset, name, value):
+        return order_by_score(queryset, value)
+
 
 class IngredientFilter(SearchFilter):
     search_param = 'name'
@@ -0,0 +1,223 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+SPACES = re.compile(r'\s+')
+
+current_recorder = ContextVar('current_recorder', default=None)
+
+
+def fingerprint(sql):
+    """
+    Форма запроса без значений: литералы и списки IN сворачиваются,
+    чтобы запросы N+1 с разными id совпадали.
+    """
+    sql = IN_LIST.sub('(...)', sql)
+    sql = LITERALS.sub('?', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class QueryRecorder:
+    """
+    Счетчик запросов одного HTTP-запроса: число, время в базе
+    и повторы одной формы запроса. Запросы могут выполняться
+    в нескольких потоках (пул асинхронных представлений).
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def record(self, sql, duration):
+        shape = fingerprint(sql)
+        with self.lock:
+            self.duration += duration
+            self.count += 1
+            self.shapes[shape] += 1
+
+    def duplicates(self):
+        return {
+            shape: count for shape, count in self.shapes.items()
+            if count >= settings.API_METRICS_DUPLICATE_THRESHOLD
+        }
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Обертка execute_wrapper на каждом соединении: запрос учитывается
+    в счетчике текущего HTTP-запроса. Счетчик хранится в контекстной
+    переменной, которую sync_to_async передает в потоки пула.
+    """
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.record(sql, time.perf_counter() - start)
+
+
+def install_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class EndpointStats:
+    """
+    Последние API_METRICS_WINDOW замеров по каждому эндпоинту
+    в памяти процесса.
+    """
+    FIELDS = ('total_ms', 'db_ms', 'view_ms', 'serialize_ms', 'queries')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(
+            lambda: deque(maxlen=settings.API_METRICS_WINDOW)
+        )
+        self.requests = Counter()
+        self.duplicates = defaultdict(Counter)
+
+    def record(self, endpoint, sample, duplicates):
+        with self.lock:
+            self.samples[endpoint].append(sample)
+            self.requests[endpoint] += 1
+            self.duplicates[endpoint].update(duplicates)
+
+    def summary(self):
+        with self.lock:
+            samples = {
+                endpoint: list(values)
+                for endpoint, values in self.samples.items()
+            }
+            requests = dict(self.requests)
+            duplicates = {
+                endpoint: shapes.most_common(5)
+                for endpoint, shapes in self.duplicates.items()
+            }
+        return {
+            endpoint: {
+                'requests': requests[endpoint],
+                **{
+                    field: {
+                        name: percentile(
+                            [sample[index] for sample in values], fraction
+                        )
+                        for name, fraction in (
+                            ('p50', 0.5), ('p95', 0.95), ('p99', 0.99)
+                        )
+                    }
+                    for index, field in enumerate(self.FIELDS)
+                },
+                'duplicated_queries': [
+                    {'fingerprint': shape, 'count': count}
+                    for shape, count in duplicates.get(endpoint, [])
+                ],
+            }
+            for endpoint, values in samples.items()
+        }
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.requests.clear()
+            self.duplicates.clear()
+
+
+endpoint_stats = EndpointStats()
+
+
+class QueryMetricsMiddleware:
+    """
+    Замеряет число и время SQL-запросов во всех потоках запроса,
+    время сериализации ответа в JSON (renderer.render), время
+    представления без запросов к базе и общее время, отдает их
+    в заголовке Server-Timing и копит перцентили по эндпоинтам.
+    Включается настройкой API_METRICS.
+    """
+    def __init__(self, get_response):
+        if not settings.API_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        connection_created.connect(install_recorder)
+        for connection in connections.all():
+            install_recorder(connection)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request.metrics_serialize = 0.0
+        token = current_recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        total = time.perf_counter() - start
+        self.finish(request, response, recorder, total)
+        return response
+
+    def process_template_response(self, request, response):
+        renderer = getattr(response, 'accepted_renderer', None)
+        if renderer is None:
+            return response
+        render = renderer.render
+
+        def timed_render(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return render(*args, **kwargs)
+            finally:
+                request.metrics_serialize += time.perf_counter() - start
+
+        renderer.render = timed_render
+        return response
+
+    def finish(self, request, response, recorder, total):
+        match = request.resolver_match
+        if match is None or match.url_name == 'metrics':
+            return
+        endpoint = f'{request.method} {match.view_name}'
+        duplicates = recorder.duplicates()
+        for shape, count in duplicates.items():
+            logger.warning(
+                'Повторяющийся запрос (%s раз) в %s: %s',
+                count, endpoint, shape
+            )
+        serialize = request.metrics_serialize
+        view = total - recorder.duration - serialize
+        endpoint_stats.record(endpoint, (
+            round(total * 1000, 2), round(recorder.duration * 1000, 2),
+            round(view * 1000, 2), round(serialize * 1000, 2),
+            recorder.count
+        ), duplicates)
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={recorder.duration * 1000:.2f};'
+            f'desc="{recorder.count} queries"',
+            f'view;dur={view * 1000:.2f};desc="view and serializers"',
+            f'serialize;dur={serialize * 1000:.2f};desc="renderer.render"',
+            f'total;dur={total * 1000:.2f}',
+        ))
+        if duplicates:
+            response['Server-Timing'] += (
+                f', dup;desc="{sum(duplicates.values())} duplicated queries"'
+            )
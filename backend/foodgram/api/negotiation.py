@@ -0,0 +1,10 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+    """
+    Для выгрузок параметр format выбирает формат файла, а не рендерер,
+    поэтому ошибки всегда отдаются первым рендерером из настроек.
+    """
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
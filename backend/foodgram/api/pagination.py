@@ -1,6 +1,44 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+RANKING_PARAMS = ('ordering', 'search', 'ingredients')
 
 
 class Paginator(PageNumberPagination):
     page_size_query_param = 'limit'
     page_size = 6
+
+
+class RecipeCursorPaginator(CursorPagination):
+    """
+    Курсорная пагинация рецептов: без COUNT(*) и OFFSET,
+    следующая страница выбирается по (pub_date, id) последнего рецепта.
+    """
+    page_size_query_param = 'limit'
+    page_size = 6
+    ordering = ('-pub_date', '-id')
+
+
+class SubscriptionCursorPaginator(RecipeCursorPaginator):
+    ordering = '-id'
+
+
+def use_cursor(request):
+    """
+    Курсорный режим включается параметром pagination=cursor,
+    ссылки next/previous уже содержат параметр cursor.
+    """
+    return (
+        request.query_params.get('pagination') == 'cursor'
+        or 'cursor' in request.query_params
+    )
+
+
+def use_recipe_cursor(request):
+    """
+    Курсор по (pub_date, id) не сохраняет порядок по рейтингу,
+    релевантности поиска и совпадению ингредиентов: с параметрами
+    из RANKING_PARAMS рецепты разбиваются на страницы по номеру.
+    """
+    return use_cursor(request) and not any(
+        request.query_params.get(param) for param in RANKING_PARAMS
+    )
@@ -0,0 +1,234 @@
+import binascii
+import codecs
+import json
+import re
+
+import orjson
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import JSONParser
+
+CHUNK_SIZE = 64 * 1024
+HEADER_LIMIT = 256
+STRUCTURE = re.compile(rb'["{}\[\],:]')
+STRING_END = re.compile(rb'["\\]')
+SKIPPED_ESCAPES = {ord('n'), ord('r'), ord('t')}
+
+
+class RequestEntityTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Слишком большой запрос.'
+    default_code = 'request_entity_too_large'
+
+
+class ImageExtractor:
+    """
+    Разбирает JSON по частям: значение поля image верхнего уровня
+    декодируется из base64 прямо во временный файл, остальной документ
+    накапливается в буфере с null на месте изображения.
+    """
+    def __init__(self, max_image_size, max_document_size):
+        self.max_image_size = max_image_size
+        self.max_document_size = max_document_size
+        self.document = bytearray()
+        self.depth = 0
+        self.expect_key = False
+        self.in_string = False
+        self.in_image = False
+        self.escape = False
+        self.string_start = 0
+        self.last_key = None
+        self.header = bytearray()
+        self.header_done = False
+        self.pending = bytearray()
+        self.image = None
+        self.image_size = 0
+
+    def feed(self, chunk):
+        position = 0
+        while position < len(chunk):
+            if self.in_image:
+                position = self._feed_image(chunk, position)
+            elif self.in_string:
+                position = self._feed_string(chunk, position)
+            else:
+                position = self._feed_structure(chunk, position)
+        if self.max_document_size is not None and (
+            len(self.document) > self.max_document_size
+        ):
+            raise RequestEntityTooLarge()
+
+    def _feed_structure(self, chunk, position):
+        match = STRUCTURE.search(chunk, position)
+        if match is None:
+            self.document += chunk[position:]
+            return len(chunk)
+        end = match.start()
+        self.document += chunk[position:end]
+        char = chunk[end:end + 1]
+        if char == b'"':
+            if self.depth == 1 and not self.expect_key and (
+                self.last_key == b'image'
+            ):
+                self.in_image = True
+                self.last_key = None
+                self.document += b'null'
+                self.image = TemporaryUploadedFile(
+                    'image', 'application/octet-stream', 0, None
+                )
+            else:
+                self.in_string = True
+                self.string_start = len(self.document)
+                self.document += char
+            return end + 1
+        self.document += char
+        if char in (b'{', b'['):
+            self.depth += 1
+            self.expect_key = char == b'{' and self.depth == 1
+        elif char in (b'}', b']'):
+            self.depth -= 1
+        elif self.depth == 1 and char == b',':
+            self.expect_key = True
+        elif self.depth == 1 and char == b':':
+            self.expect_key = False
+        return end + 1
+
+    def _feed_string(self, chunk, position):
+        if self.escape:
+            self.escape = False
+            self.document += chunk[position:position + 1]
+            return position + 1
+        match = STRING_END.search(chunk, position)
+        if match is None:
+            self.document += chunk[position:]
+            return len(chunk)
+        end = match.start()
+        self.document += chunk[position:end + 1]
+        if chunk[end:end + 1] == b'\\':
+            self.escape = True
+            return end + 1
+        self.in_string = False
+        if self.depth == 1 and self.expect_key:
+            self.last_key = bytes(self.document[self.string_start + 1:-1])
+        return end + 1
+
+    def _feed_image(self, chunk, position):
+        if self.escape:
+            self.escape = False
+            char = chunk[position]
+            if char == ord('/'):
+                self._write_base64(b'/')
+            elif char not in SKIPPED_ESCAPES:
+                raise ParseError('Некорректное изображение.')
+            return position + 1
+        match = STRING_END.search(chunk, position)
+        end = len(chunk) if match is None else match.start()
+        self._write_base64(chunk[position:end])
+        if match is None:
+            return end
+        if chunk[end:end + 1] == b'\\':
+            self.escape = True
+        else:
+            self.in_image = False
+            self._finish_image()
+        return end + 1
+
+    def _write_base64(self, data):
+        if not self.header_done:
+            self.header += data
+            if not self.header.startswith(b'data:'[:len(self.header)]):
+                data, self.header_done = bytes(self.header), True
+            elif b',' in self.header:
+                data = bytes(self.header.split(b',', 1)[1])
+                self.header_done = True
+            else:
+                if len(self.header) > HEADER_LIMIT:
+                    raise ParseError('Некорректное изображение.')
+                return
+        self.pending += data
+        usable = len(self.pending) - len(self.pending) % 4
+        if usable:
+            self._write_decoded(bytes(self.pending[:usable]))
+            del self.pending[:usable]
+
+    def _write_decoded(self, data):
+        try:
+            decoded = binascii.a2b_base64(data)
+        except binascii.Error:
+            raise ParseError('Некорректное изображение.')
+        self.image_size += len(decoded)
+        if self.image_size > self.max_image_size:
+            raise RequestEntityTooLarge(
+                'Размер изображения превышает '
+                f'{self.max_image_size} байт.'
+            )
+        self.image.write(decoded)
+
+    def _finish_image(self):
+        if not self.header_done:
+            self.pending += self.header
+            self.header_done = True
+        if self.pending:
+            self._write_decoded(bytes(self.pending))
+            self.pending.clear()
+        self.image.size = self.image_size
+        self.image.seek(0)
+
+    def close(self):
+        if self.image is not None:
+            self.image.close()
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser на orjson: тело в UTF-8 разбирается без промежуточной
+    строки, другие кодировки сначала декодируются.
+    """
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            document = stream.read()
+            if codecs.lookup(encoding).name != 'utf-8':
+                document = document.decode(encoding)
+            return orjson.loads(document)
+        except ValueError as error:
+            raise ParseError(f'JSON parse error - {error}')
+
+
+class RecipeJSONParser(JSONParser):
+    """
+    JSON-парсер рецептов: изображение в base64 не держится в памяти
+    целиком, а декодируется во временный файл по мере чтения запроса.
+    Слишком большие изображения отклоняются с кодом 413 до окончания
+    декодирования. DATA_UPLOAD_MAX_MEMORY_SIZE = None снимает
+    ограничение на остальную часть документа.
+    """
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        max_image_size = settings.RECIPE_IMAGE_MAX_SIZE
+        max_document_size = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        request = parser_context.get('request')
+        if request is not None and max_document_size is not None:
+            length = request.META.get('CONTENT_LENGTH') or 0
+            if int(length) > max_image_size * 4 // 3 + max_document_size:
+                raise RequestEntityTooLarge()
+        if stream is None:
+            raise ParseError('Пустое тело запроса.')
+        extractor = ImageExtractor(max_image_size, max_document_size)
+        try:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                extractor.feed(chunk)
+            if extractor.in_image or extractor.in_string:
+                raise ParseError('Некорректный JSON.')
+            data = json.loads(codecs.decode(extractor.document, encoding))
+            if extractor.image is not None and isinstance(data, dict):
+                data['image'], extractor.image = extractor.image, None
+        except (ValueError, UnicodeDecodeError) as error:
+            raise ParseError(f'JSON parse error - {error}')
+        finally:
+            extractor.close()
+        return data
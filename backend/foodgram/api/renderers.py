@@ -0,0 +1,40 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+LINE_SEPARATORS = (
+    ('\u2028'.encode(), b'\\u2028'),
+    ('\u2029'.encode(), b'\\u2029'),
+)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson с тем же выводом: компактный UTF-8,
+    даты и типы, которых нет в orjson, преобразует JSONEncoder из DRF.
+    Ответы с отступом и данные, которые orjson не кодирует (например,
+    целые больше 64 бит), отдаются стандартному JSONRenderer.
+    Отличается только запись чисел с плавающей точкой в экспоненте
+    (1e16 вместо 1e+16), в ответах API таких чисел нет.
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.ensure_ascii or not self.compact or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ) is not None:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        try:
+            ret = orjson.dumps(data, default=self.default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        for separator, escaped in LINE_SEPARATORS:
+            ret = ret.replace(separator, escaped)
+        return ret
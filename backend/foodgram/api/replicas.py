@@ -0,0 +1,163 @@
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+STICKY_KEY = 'replica:primary:{}'
+LAG_QUERY = (
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() '
+    'THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) '
+    'END'
+)
+
+read_alias = ContextVar('read_alias', default=None)
+
+
+class ReplicaSelector:
+    """
+    Выбор реплики для чтения: по кругу (round_robin) или с наименьшим
+    отставанием (least_lag). Отставание проверяется не чаще раза
+    в DB_REPLICA_LAG_INTERVAL секунд, реплики, недоступные или
+    отставшие больше чем на DB_REPLICA_MAX_LAG, пропускаются.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+        self.lags = {}
+        self.checked_at = None
+
+    def lag(self, alias):
+        connection = connections[alias]
+        if connection.vendor != 'postgresql':
+            return 0.0
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(LAG_QUERY)
+                lag, = cursor.fetchone()
+        except DatabaseError as error:
+            logger.warning('Реплика %s недоступна: %s', alias, error)
+            connection.close()
+            return None
+        return float(lag or 0)
+
+    def current_lags(self):
+        now = time.monotonic()
+        if self.checked_at is not None and (
+            now - self.checked_at < settings.DB_REPLICA_LAG_INTERVAL
+        ):
+            return self.lags
+        if not self.lock.acquire(blocking=False):
+            return self.lags
+        try:
+            self.lags = {
+                alias: self.lag(alias) for alias in settings.DB_REPLICAS
+            }
+            self.checked_at = time.monotonic()
+        finally:
+            self.lock.release()
+        return self.lags
+
+    def choose(self):
+        lags = self.current_lags()
+        available = [
+            alias for alias in settings.DB_REPLICAS
+            if lags.get(alias, 0.0) is not None
+            and lags.get(alias, 0.0) <= settings.DB_REPLICA_MAX_LAG
+        ]
+        if not available:
+            return None
+        if settings.DB_REPLICA_SELECTION == 'least_lag':
+            return min(available, key=lambda alias: lags.get(alias, 0.0))
+        return available[next(self.counter) % len(available)]
+
+
+replica_selector = ReplicaSelector()
+
+
+class ReplicaRouter:
+    """
+    Чтение в запросах, отмеченных ReplicaMiddleware, идет в выбранную
+    реплику, запись и миграции — всегда в основную базу.
+    """
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def cache_timeout(timeout):
+    """
+    Срок хранения в кэше данных, прочитанных из реплики, — не больше
+    ее возможного отставания: иначе реплика, отстающая от основной
+    базы, заполнит кэш под новым поколением старыми строками.
+    """
+    if read_alias.get() is None:
+        return timeout
+    return min(
+        timeout,
+        settings.DB_REPLICA_MAX_LAG + settings.DB_REPLICA_LAG_INTERVAL
+    )
+
+
+def sticky_key(request):
+    """
+    Ключ закрепления клиента за основной базой по токену
+    или сессии.
+    """
+    credentials = request.META.get('HTTP_AUTHORIZATION') or (
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    )
+    if not credentials:
+        return None
+    return STICKY_KEY.format(
+        hashlib.sha256(credentials.encode()).hexdigest()
+    )
+
+
+class ReplicaMiddleware:
+    """
+    Безопасные запросы к эндпоинтам из DB_REPLICA_VIEWS читают из
+    реплики. После успешной записи клиент на DB_REPLICA_STICKY_SECONDS
+    закрепляется за основной базой, чтобы видеть свои изменения.
+    Включается, если заданы реплики (DB_REPLICA_HOSTS).
+    """
+    def __init__(self, get_response):
+        if not settings.DB_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            read_alias.set(None)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            key = sticky_key(request)
+            if key is not None:
+                cache.set(key, True, settings.DB_REPLICA_STICKY_SECONDS)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (request.method in SAFE_METHODS
+                and request.resolver_match.url_name
+                in settings.DB_REPLICA_VIEWS):
+            key = sticky_key(request)
+            if key is None or not cache.get(key):
+                read_alias.set(replica_selector.choose())
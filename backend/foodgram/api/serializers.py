@@ -1,19 +1,32 @@
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import QuerySet
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from api.compiled import (INGREDIENT_FIELDS, TAG_FIELDS, USER_FIELDS,
+                          CompiledListSerializer, CompiledSerializerMixin,
+                          recipe_images, recipe_ingredients, recipe_rows,
+                          recipe_tags, viewer_flag)
+from api.viewer import get_viewer_state
+from recipes.images import rendition_urls, schedule_renditions
 from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
                             ShoppingCart, Tag, TagRecipe)
 from users.models import Subscribe, User
 
 
-class CustomUserSerializer(UserSerializer):
+class CustomUserSerializer(CompiledSerializerMixin, UserSerializer):
     """
     Сериализатор модели пользователя, добавили поле is_subscribed,
     is_subscribed показывает подписан ли текущий пользователь на этого.
     """
     is_subscribed = serializers.SerializerMethodField(read_only=True)
+    compiled_fields = USER_FIELDS
+    compiled_annotations = ('is_subscribed',)
 
     class Meta:
         model = User
@@ -25,12 +38,19 @@ class CustomUserSerializer(UserSerializer):
             'last_name',
             'is_subscribed'
         ]
+        list_serializer_class = CompiledListSerializer
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        return request.user.follower.filter(author=obj).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return obj.id in get_viewer_state(self.context).following
+
+    def compile_row(self, row):
+        user = super().compile_row(row)
+        user['is_subscribed'] = viewer_flag(
+            row, 'is_subscribed', get_viewer_state(self.context), 'following'
+        )
+        return user
 
 
 class CustomUserCreateSerializer(UserCreateSerializer):
@@ -63,6 +83,34 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         ]
 
 
+class SubscriptionsQuerySerializer(serializers.Serializer):
+    """
+    Проверка параметров запроса списка подписок.
+    """
+    recipes_limit = serializers.IntegerField(min_value=0, required=False)
+
+
+class StreamedBase64ImageField(Base64ImageField):
+    """
+    Base64ImageField, принимающий и уже декодированный файл
+    от RecipeJSONParser: файл не читается в память целиком.
+    """
+    def to_internal_value(self, data):
+        if not isinstance(data, File):
+            return super().to_internal_value(data)
+        try:
+            with Image.open(data) as image:
+                extension = image.format.lower()
+        except (OSError, AttributeError):
+            raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+        extension = 'jpg' if extension == 'jpeg' else extension
+        if extension not in self.ALLOWED_TYPES:
+            raise serializers.ValidationError(self.INVALID_TYPE_MESSAGE)
+        data.seek(0)
+        data.name = f'{self.get_file_name(None)}.{extension}'
+        return serializers.ImageField.to_internal_value(self, data)
+
+
 class RepresentationFavoriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
@@ -75,7 +123,6 @@ class MySubscriptionSerializer(serializers.ModelSerializer):
     """
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -91,43 +138,68 @@ class MySubscriptionSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        return request.user.follower.filter(author=obj).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return obj.id in get_viewer_state(self.context).following
 
     def get_recipes(self, obj):
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
-        recipes = obj.recipes.all()
-        limit = request.query_params.get('recipes_limit')
-        if limit:
-            recipes = recipes[:int(limit)]
+        if hasattr(obj, 'limited_recipes'):
+            recipes = obj.limited_recipes
+        else:
+            query = SubscriptionsQuerySerializer(data=request.query_params)
+            query.is_valid(raise_exception=True)
+            recipes = obj.recipes.all()
+            limit = query.validated_data.get('recipes_limit')
+            if limit is not None:
+                recipes = recipes[:limit]
         return RepresentationFavoriteSerializer(
             recipes, many=True
         ).data
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.all().count()
-
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(CompiledSerializerMixin, serializers.ModelSerializer):
     """
     Сериализатор чтения тегов.
     """
+    compiled_fields = TAG_FIELDS
+
     class Meta:
         model = Tag
         fields = '__all__'
+        list_serializer_class = CompiledListSerializer
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(CompiledSerializerMixin,
+                           serializers.ModelSerializer):
     """
     Сериализатор для чтения ингридиентов, модель Ингридиенты.
     """
+    compiled_fields = INGREDIENT_FIELDS
+
     class Meta:
         model = Ingredient
         fields = '__all__'
+        list_serializer_class = CompiledListSerializer
+
+
+class IngredientsQuerySerializer(serializers.Serializer):
+    """
+    Проверка параметров поиска ингредиентов.
+    """
+    limit = serializers.IntegerField(min_value=1, required=False)
+
+
+class RecommendationsQuerySerializer(serializers.Serializer):
+    """
+    Проверка параметров похожих и рекомендованных рецептов.
+    """
+    limit = serializers.IntegerField(
+        min_value=1, max_value=settings.RECOMMENDATIONS_TOP_K,
+        default=settings.RECOMMENDATIONS_TOP_K
+    )
 
 
 class IngredientRecipeSerializer(serializers.ModelSerializer):
@@ -160,9 +232,14 @@ class AddIngredientRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class ShowRecipeSerializer(serializers.ModelSerializer):
+class ShowRecipeSerializer(CompiledSerializerMixin,
+                           serializers.ModelSerializer):
     """
     Сериализатор просмотра модели Рецепт.
+    Флаги is_favorited, is_in_shopping_cart и is_subscribed автора
+    берутся из аннотаций queryset, если они есть, иначе из ViewerState.
+    В режиме compiled рецепты собираются из строк recipe_rows,
+    теги и ингредиенты страницы загружаются двумя запросами.
     """
     tags = TagSerializer(many=True)
     author = CustomUserSerializer(read_only=True)
@@ -174,6 +251,7 @@ class ShowRecipeSerializer(serializers.ModelSerializer):
     )
     is_in_shopping_cart = serializers.SerializerMethodField(
         method_name='get_is_in_shopping_cart')
+    renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -186,25 +264,91 @@ class ShowRecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'renditions',
             'text',
             'cooking_time'
         )
+        list_serializer_class = CompiledListSerializer
+
+    def compiled_rows(self, data):
+        if isinstance(data, QuerySet) and data._result_cache is None:
+            data = recipe_rows(data)
+        if all(isinstance(row, dict) for row in data):
+            return data
+        return None
+
+    def compilable(self, instance):
+        return isinstance(instance, dict)
+
+    def compile(self, rows):
+        rows = list(rows)
+        recipe_ids = [row['id'] for row in rows]
+        tags = recipe_tags(recipe_ids)
+        ingredients = recipe_ingredients(recipe_ids)
+        state = get_viewer_state(self.context)
+        request = self.context.get('request')
+        recipes = []
+        for row in rows:
+            image, renditions = recipe_images(row, request)
+            recipes.append({
+                'id': row['id'],
+                'tags': tags[row['id']],
+                'author': {
+                    'id': row['author_id'],
+                    'email': row['author__email'],
+                    'username': row['author__username'],
+                    'first_name': row['author__first_name'],
+                    'last_name': row['author__last_name'],
+                    'is_subscribed': viewer_flag(
+                        row, 'is_subscribed', state, 'following', 'author_id'
+                    ),
+                },
+                'ingredients': ingredients[row['id']],
+                'is_favorited': viewer_flag(
+                    row, 'is_favorited', state, 'favorites'
+                ),
+                'is_in_shopping_cart': viewer_flag(
+                    row, 'is_in_shopping_cart', state, 'shopping_cart'
+                ),
+                'name': row['name'],
+                'image': image,
+                'renditions': renditions,
+                'text': row['text'],
+                'cooking_time': row['cooking_time'],
+            })
+        return recipes
+
+    def to_representation(self, instance):
+        if hasattr(instance, 'is_subscribed'):
+            instance.author.is_subscribed = instance.is_subscribed
+        return super().to_representation(instance)
 
     def get_ingredients(self, obj):
-        ingredients = IngredientRecipe.objects.filter(recipe=obj)
+        ingredients = obj.ingredientrecipe_set.all()
         return IngredientRecipeSerializer(ingredients, many=True).data
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        return obj.id in get_viewer_state(self.context).favorites
+
+    def get_renditions(self, obj):
+        urls = rendition_urls(obj)
         request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        return request.user.favorites.filter(recipe_id=obj).exists()
+        if urls is None or request is None:
+            return urls
+        return {
+            size: {
+                extension: request.build_absolute_uri(url)
+                for extension, url in formats.items()
+            }
+            for size, formats in urls.items()
+        }
 
     def get_is_in_shopping_cart(self, obj):
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
-            return False
-        return request.user.shoppingcart.filter(recipe_id=obj).exists()
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        return obj.id in get_viewer_state(self.context).shopping_cart
 
 
 class RecipeSerializer(serializers.ModelSerializer):
@@ -217,7 +361,7 @@ class RecipeSerializer(serializers.ModelSerializer):
     tags = serializers.PrimaryKeyRelatedField(
         queryset=Tag.objects.all(), many=True
     )
-    image = Base64ImageField()
+    image = StreamedBase64ImageField()
     author = CustomUserSerializer(read_only=True)
 
     class Meta:
@@ -233,6 +377,20 @@ class RecipeSerializer(serializers.ModelSerializer):
             'cooking_time'
         )
 
+    def is_valid(self, raise_exception=False):
+        """
+        Временный файл изображения от RecipeJSONParser закрывается
+        сразу, если данные не прошли проверку.
+        """
+        try:
+            return super().is_valid(raise_exception=raise_exception)
+        finally:
+            image = None
+            if isinstance(self.initial_data, dict):
+                image = self.initial_data.get('image')
+            if self._errors and isinstance(image, File):
+                image.close()
+
     def validate_cooking_time(self, value):
         if value < 1:
             raise serializers.ValidationError(
@@ -253,19 +411,73 @@ class RecipeSerializer(serializers.ModelSerializer):
                     'Ингредиенты должны быть уникальными'
                 )
             lst.append(item['id'])
+        existing = Ingredient.objects.filter(id__in=lst).count()
+        if existing != len(lst):
+            raise serializers.ValidationError(
+                'Указан несуществующий ингредиент'
+            )
         return data
 
     def create_ingredients(self, ingredients, recipe):
-        for item in ingredients:
-            ingredient = Ingredient.objects.get(id=item['id'])
-            IngredientRecipe.objects.create(
-                ingredient=ingredient, recipe=recipe, amount=item['amount']
-            )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                ingredient_id=item['id'],
+                recipe=recipe,
+                amount=item['amount']
+            ) for item in ingredients
+        )
 
     def create_tags(self, tags, recipe):
-        for tag in tags:
-            TagRecipe.objects.create(recipe=recipe, tag=tag)
+        TagRecipe.objects.bulk_create(
+            TagRecipe(recipe=recipe, tag=tag) for tag in set(tags)
+        )
+
+    def update_ingredients(self, ingredients, recipe):
+        """
+        Сравнивает текущие строки рецепта с новыми: удаляет лишние,
+        обновляет изменившиеся количества и добавляет новые.
+        """
+        current = {
+            row.ingredient_id: row
+            for row in IngredientRecipe.objects.filter(recipe=recipe)
+        }
+        amounts = {item['id']: item['amount'] for item in ingredients}
+        removed = current.keys() - amounts.keys()
+        if removed:
+            IngredientRecipe.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        changed = []
+        for ingredient_id, amount in amounts.items():
+            row = current.get(ingredient_id)
+            if row is not None and row.amount != amount:
+                row.amount = amount
+                changed.append(row)
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ['amount'])
+        self.create_ingredients(
+            [item for item in ingredients if item['id'] not in current],
+            recipe
+        )
+
+    def update_tags(self, tags, recipe):
+        current = set(
+            TagRecipe.objects.filter(recipe=recipe).values_list(
+                'tag_id', flat=True
+            )
+        )
+        new = {tag.id: tag for tag in tags}
+        removed = current - new.keys()
+        if removed:
+            TagRecipe.objects.filter(
+                recipe=recipe, tag_id__in=removed
+            ).delete()
+        self.create_tags(
+            [tag for tag_id, tag in new.items() if tag_id not in current],
+            recipe
+        )
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
@@ -273,19 +485,33 @@ class RecipeSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=author, **validated_data)
         self.create_ingredients(ingredients, recipe)
         self.create_tags(tags, recipe)
+        transaction.on_commit(lambda: schedule_renditions(recipe.pk))
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        IngredientRecipe.objects.filter(recipe=instance).delete()
-        TagRecipe.objects.filter(recipe=instance).delete()
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
-        self.create_ingredients(ingredients, instance)
-        self.create_tags(tags, instance)
+        self.update_ingredients(ingredients, instance)
+        self.update_tags(tags, instance)
+        if 'image' in validated_data:
+            validated_data['renditions_ready'] = False
+            transaction.on_commit(lambda: schedule_renditions(instance.pk))
         return super().update(instance, validated_data)
 
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        finally:
+            image = self.validated_data.get('image')
+            if isinstance(image, File):
+                image.close()
+
     def to_representation(self, instance):
-        return ShowRecipeSerializer(instance).data
+        instance = Recipe.objects.with_related().with_user_flags(
+            self.context['request'].user
+        ).get(pk=instance.pk)
+        return ShowRecipeSerializer(instance, context=self.context).data
 
 
 class ShoppingCartSerializer(serializers.ModelSerializer):
@@ -0,0 +1,52 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.cache import bump_generation, viewer_entity
+from recipes.images import renditions_made
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag, TagRecipe)
+from users.models import Subscribe, User
+
+ENTITIES = {
+    Recipe: 'recipe',
+    IngredientRecipe: 'recipe',
+    TagRecipe: 'recipe',
+    Tag: 'tag',
+    Ingredient: 'ingredient',
+    User: 'user',
+}
+
+
+def bump_on_commit(entity, using=None):
+    """
+    Поколение меняется после фиксации транзакции, иначе параллельный
+    запрос успеет закэшировать еще не измененные данные под новым
+    поколением.
+    """
+    transaction.on_commit(partial(bump_generation, entity), using=using)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_cache_generation(sender, update_fields=None, using=None,
+                          **kwargs):
+    if sender not in ENTITIES:
+        return
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    bump_on_commit(ENTITIES[sender], using)
+
+
+@receiver([post_save, post_delete], sender=Favorite)
+@receiver([post_save, post_delete], sender=ShoppingCart)
+@receiver([post_save, post_delete], sender=Subscribe)
+def bump_viewer_generation(sender, instance, using=None, **kwargs):
+    bump_on_commit(viewer_entity(instance.user_id), using)
+
+
+@receiver(renditions_made)
+def bump_recipe_generation(sender, **kwargs):
+    bump_on_commit('recipe')
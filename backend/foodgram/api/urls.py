@@ -1,7 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
-from . import views
+from . import async_views, views
 
 router_api_v1 = routers.DefaultRouter()
 router_api_v1.register('tags', views.TagsViewSet, basename='tags')
@@ -10,7 +11,32 @@ router_api_v1.register(
 ),
 router_api_v1.register('recipes', views.RecipeViewSet, basename='recipes')
 
+async_urlpatterns = [
+    path('tags/', async_views.tag_list_view, name='async-tags-list'),
+    path(
+        'tags/<int:pk>/', async_views.tag_detail_view, name='async-tags-detail'
+    ),
+    path(
+        'ingredients/', async_views.ingredient_list_view,
+        name='async-ingredients-list'
+    ),
+    path(
+        'ingredients/<int:pk>/', async_views.ingredient_detail_view,
+        name='async-ingredients-detail'
+    ),
+    path('recipes/', async_views.recipe_list_view, name='async-recipes-list'),
+    path(
+        'recipes/<int:pk>/', async_views.recipe_detail_view,
+        name='async-recipes-detail'
+    ),
+    path(
+        'users/subscriptions/', async_views.subscription_list_view,
+        name='async-subscriptions'
+    ),
+]
+
 urlpatterns = [
+    path('_metrics/', views.metrics, name='metrics'),
     path(
         'users/subscriptions/',
         views.subscriptions_list,
@@ -25,3 +51,6 @@ urlpatterns = [
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns = async_urlpatterns + urlpatterns
@@ -0,0 +1,45 @@
+from django.utils.functional import cached_property
+
+
+class ViewerState:
+    """
+    Избранное, список покупок и подписки текущего пользователя.
+    Каждое множество загружается одним запросом при первом обращении
+    и переиспользуется всеми сериализаторами в рамках запроса.
+    """
+    def __init__(self, user):
+        self.user = user
+
+    def _ids(self, related_name, field):
+        if self.user is None or self.user.is_anonymous:
+            return frozenset()
+        return frozenset(
+            getattr(self.user, related_name).values_list(field, flat=True)
+        )
+
+    @cached_property
+    def favorites(self):
+        return self._ids('favorites', 'recipe_id')
+
+    @cached_property
+    def shopping_cart(self):
+        return self._ids('shoppingcart', 'recipe_id')
+
+    @cached_property
+    def following(self):
+        return self._ids('follower', 'author_id')
+
+
+def get_viewer_state(context):
+    """
+    Состояние просмотра хранится на объекте запроса, поэтому оно общее
+    для вложенных сериализаторов и для сериализаторов djoser.
+    """
+    request = context.get('request')
+    if request is None:
+        return ViewerState(None)
+    state = getattr(request, 'viewer_state', None)
+    if state is None or state.user != request.user:
+        state = ViewerState(request.user)
+        request.viewer_state = state
+    return state
@@ -1,32 +1,90 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.db.models import BooleanField, OuterRef, Prefetch, Subquery, Value
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from api.cache import AnonymousCacheMixin, cached_first_page, viewer_entity
+from api.compiled import recipe_rows
+from api.conditional import (RECIPE_ENTITIES, conditional_response,
+                             recipe_etag, recipe_list_etag)
+from api.exports import EXPORTS, shopping_list
 from api.filters import IngredientFilter, RecipeFilter
-from api.pagination import Paginator
+from api.metrics import endpoint_stats
+from api.negotiation import ExportContentNegotiation
+from api.pagination import (Paginator, RecipeCursorPaginator,
+                            SubscriptionCursorPaginator, use_cursor,
+                            use_recipe_cursor)
+from api.parsers import RecipeJSONParser
 from api.permissions import IsAuthorOrAdminOrReadOnly
 from api.serializers import (FavoriteSerializer, IngredientSerializer,
+                             IngredientsQuerySerializer,
                              MySubscriptionSerializer, RecipeSerializer,
+                             RecommendationsQuerySerializer,
                              ShoppingCartSerializer, ShowRecipeSerializer,
-                             SubscriptionSerializer, TagSerializer)
-from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
-                            ShoppingCart, Tag)
+                             SubscriptionSerializer,
+                             SubscriptionsQuerySerializer, TagSerializer)
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.scores import order_by_score
+from recipes.search import ingredient_index
+from recipes.similarity import recommended_recipes
 from users.models import Subscribe, User
 
 
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    """
+    Перцентили времени и числа запросов по эндпоинтам
+    (при включенной настройке API_METRICS), DELETE сбрасывает замеры.
+    """
+    if request.method == 'DELETE':
+        endpoint_stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(endpoint_stats.summary())
+
+
+def subscribed_authors(user, limit=None):
+    """
+    Авторы, на которых подписан пользователь, с последними limit
+    рецептами каждого, загружаемыми одним запросом.
+    """
+    recipes = Recipe.objects.all()
+    if limit is not None:
+        recipes = recipes.filter(id__in=Subquery(
+            Recipe.objects.filter(
+                author=OuterRef('author')
+            ).values('id')[:limit]
+        ))
+    return User.objects.filter(following__user=user).annotate(
+        is_subscribed=Value(True, output_field=BooleanField())
+    ).prefetch_related(
+        Prefetch('recipes', queryset=recipes, to_attr='limited_recipes')
+    )
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def subscriptions_list(request):
     """
     Вывод списка подписок пользователя.
+    Последние recipes_limit рецептов каждого автора загружаются
+    одним запросом.
     """
-    subscriptions = User.objects.filter(following__user=request.user)
-    paginator = Paginator()
+    query = SubscriptionsQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    subscriptions = subscribed_authors(
+        request.user, query.validated_data.get('recipes_limit')
+    )
+    if use_cursor(request):
+        paginator = SubscriptionCursorPaginator()
+    else:
+        paginator = Paginator()
     page = paginator.paginate_queryset(subscriptions, request=request)
     serializer = MySubscriptionSerializer(
         page, many=True, context={'request': request}
@@ -59,20 +117,24 @@ def subscriptions_detail(request, id):
     return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
-class TagsViewSet(viewsets.ReadOnlyModelViewSet):
+class TagsViewSet(AnonymousCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
     Вывод тегов, тега для просмотра.
     """
+    cache_entities = ('tag',)
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [AllowAny]
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(AnonymousCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
     Вывод списка ингредиентов, ингредиента.
+    Поиск по name обслуживается индексом в памяти, limit
+    ограничивает число результатов.
     """
+    cache_entities = ('ingredient',)
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [AllowAny]
@@ -80,19 +142,75 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [IngredientFilter]
     search_fields = ('^name',)
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name is None:
+            return super().list(request, *args, **kwargs)
+        query = IngredientsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return Response(ingredient_index.search(
+            name, query.validated_data.get('limit')
+        ))
+
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(AnonymousCacheMixin, viewsets.ModelViewSet):
     """
     Операции с рецептами: добавление/изменение/удаление/просмотр.
     """
+    cache_entities = RECIPE_ENTITIES
     permission_classes = [IsAuthorOrAdminOrReadOnly]
     queryset = Recipe.objects.all()
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     pagination_class = Paginator
+    parser_classes = (RecipeJSONParser, FormParser, MultiPartParser)
+
+    def get_cache_version(self, request):
+        """
+        ETag входит в ключ кэша: тело из кэша всегда соответствует
+        отданному с ним ETag.
+        """
+        return self.etag
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if use_recipe_cursor(self.request):
+                self._paginator = RecipeCursorPaginator()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def list(self, request, *args, **kwargs):
+        self.etag = recipe_list_etag(request)
+        return conditional_response(
+            request, self.etag, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        self.etag = recipe_etag(kwargs['pk'], request)
+        return conditional_response(
+            request, self.etag, super().retrieve, *args, **kwargs
+        )
+
+    def get_queryset(self):
+        if self.action == 'list':
+            return Recipe.objects.with_related().with_user_flags(
+                self.request.user
+            )
+        if self.action == 'retrieve':
+            return recipe_rows(Recipe.objects.with_related().with_user_flags(
+                self.request.user
+            ))
+        return Recipe.objects.all()
+
+    def paginate_queryset(self, queryset):
+        return super().paginate_queryset(recipe_rows(queryset))
 
     def get_serializer_class(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in [
+            'list', 'retrieve', 'feed', 'similar', 'recommended'
+        ]:
             return ShowRecipeSerializer
         return RecipeSerializer
 
@@ -117,6 +235,80 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=[IsAuthenticated])
+    def feed(self, request):
+        """
+        Рецепты авторов, на которых подписан пользователь, от новых
+        к старым. Пагинация по ключу (pub_date, id), первая страница
+        кэшируется на FEED_CACHE_TIMEOUT секунд.
+        """
+        return cached_first_page(
+            request,
+            ('recipe', 'user', viewer_entity(request.user.pk)),
+            self.feed_page,
+            settings.FEED_CACHE_TIMEOUT
+        )
+
+    def feed_page(self):
+        recipes = Recipe.objects.filter(
+            author__in=Subscribe.objects.filter(
+                user=self.request.user
+            ).values('author')
+        ).with_related().with_user_flags(self.request.user)
+        paginator = RecipeCursorPaginator()
+        page = paginator.paginate_queryset(
+            recipe_rows(recipes), request=self.request, view=self
+        )
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    def recipe_list(self, recipes):
+        serializer = self.get_serializer(recipes, many=True)
+        return Response(serializer.data)
+
+    def limit(self):
+        query = RecommendationsQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        return query.validated_data['limit']
+
+    @action(methods=['get'], detail=True)
+    def similar(self, request, pk=None):
+        """
+        Рецепты, которые чаще всего добавляют в избранное вместе с этим.
+        """
+        recipe = get_object_or_404(Recipe, id=pk)
+        recipes = Recipe.objects.filter(
+            similar_to__recipe=recipe
+        ).with_related().with_user_flags(request.user).order_by(
+            '-similar_to__score', '-pub_date'
+        )
+        return self.recipe_list(recipe_rows(recipes)[:self.limit()])
+
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=[IsAuthenticated])
+    def recommended(self, request):
+        """
+        Рекомендации по избранному пользователя. Без избранного
+        отдаются популярные рецепты.
+        """
+        limit = self.limit()
+        recipes = Recipe.objects.with_related().with_user_flags(request.user)
+        recipe_ids = recommended_recipes(request.user, limit)
+        if not recipe_ids:
+            return self.recipe_list(recipe_rows(order_by_score(
+                recipes.exclude(favorites__user=request.user), 'popular'
+            ))[:limit])
+        recipes = recipes.in_bulk(recipe_ids)
+        return self.recipe_list([
+            recipes[recipe_id] for recipe_id in recipe_ids
+            if recipe_id in recipes
+        ])
+
     @action(
         methods=['post'],
         detail=True,
@@ -137,25 +329,28 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(
         methods=['get'],
         detail=False,
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        content_negotiation_class=ExportContentNegotiation
     )
-    def download_shopping_cart(
-        self, request, shopping_list='Список покупок:\n'
-    ):
-        ingredients = IngredientRecipe.objects.filter(
-            recipe__shoppingcart__user=request.user
-        ).values(
-            'ingredient__name', 'ingredient__measurement_unit'
-        ).annotate(amount=Sum('amount'))
-        for count, ingredient in enumerate(ingredients):
-            shopping_list += (
-                f"Позиция №{count+1}: {ingredient['ingredient__name']} - "
-                f"{ingredient['amount']}"
-                f" {ingredient['ingredient__measurement_unit']}\n"
+    def download_shopping_cart(self, request):
+        """
+        Выгрузка списка покупок в формате txt, csv или pdf (?format=),
+        файл отдается потоком по мере чтения строк из базы.
+        """
+        file_format = request.query_params.get('format', 'txt')
+        if file_format not in EXPORTS:
+            return Response(
+                {'format': f'Доступные форматы: {", ".join(EXPORTS)}'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        file = 'shopping_list'
-        response = HttpResponse(shopping_list, 'Content-Type: application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{file}.pdf"'
+        content_type, export = EXPORTS[file_format]
+        response = StreamingHttpResponse(
+            export(shopping_list(request.user).iterator()),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{file_format}"'
+        )
         return response
 
     @action(
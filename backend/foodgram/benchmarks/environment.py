@@ -0,0 +1,31 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import override_settings
+
+from recipes.images import executor
+
+
+@contextmanager
+def temporary_database():
+    """
+    Временная тестовая база и каталог MEDIA_ROOT на время замеров.
+    Для SQLite база создается в файле: фоновые потоки обработки
+    изображений не блокируют общую базу в памяти.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(
+                directory, 'benchmark.sqlite3'
+            )
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(MEDIA_ROOT=directory):
+                yield
+                # Дождаться фоновой обработки созданных изображений.
+                executor.shutdown(wait=True)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
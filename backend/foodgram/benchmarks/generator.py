@@ -0,0 +1,173 @@
+import io
+import random
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from PIL import Image
+
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag, TagRecipe)
+from users.models import Subscribe, User
+
+IMAGE_NAME = 'recipes/benchmark.jpg'
+
+
+def image_content():
+    buffer = io.BytesIO()
+    Image.new('RGB', (1200, 800), (210, 140, 60)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def zipf_weights(size, exponent=1.0):
+    """
+    Веса распределения Ципфа: несколько популярных объектов
+    и длинный хвост редких.
+    """
+    return [1 / (rank ** exponent) for rank in range(1, size + 1)]
+
+
+def sample(rng, population, cum_weights, count):
+    """
+    count различных элементов population с весами cum_weights.
+    """
+    count = min(count, len(population))
+    chosen = set()
+    while len(chosen) < count:
+        chosen.update(rng.choices(
+            population, cum_weights=cum_weights, k=count - len(chosen)
+        ))
+    return chosen
+
+
+def cumulative(weights):
+    total, result = 0, []
+    for weight in weights:
+        total += weight
+        result.append(total)
+    return result
+
+
+class DataGenerator:
+    """
+    Синтетические данные для нагрузочных замеров. Ингредиенты и теги
+    загружаются командой load_data из recipes/data, популярность
+    ингредиентов, авторов и рецептов распределена по Ципфу,
+    случайность фиксируется seed.
+    """
+    def __init__(self, users, recipes, favorites=20, carts=5, follows=10,
+                 seed=0, batch_size=2000, stdout=None):
+        self.users = users
+        self.recipes = recipes
+        self.favorites = favorites
+        self.carts = carts
+        self.follows = follows
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.stdout = stdout
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def bulk(self, model, objects):
+        batch, created = [], 0
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+                created += len(batch)
+                batch = []
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+        created += len(batch)
+        self.log(f'{model._meta.verbose_name_plural}: {created}')
+
+    def create_users(self):
+        start = User.objects.count()
+        self.bulk(User, (
+            User(
+                username=f'bench{index}', email=f'bench{index}@example.com',
+                first_name='Bench', last_name=str(index), password='!'
+            )
+            for index in range(start, start + self.users)
+        ))
+        return list(User.objects.filter(
+            username__startswith='bench'
+        ).values_list('id', flat=True))
+
+    def create_recipes(self, author_ids):
+        storage = Recipe.image.field.storage
+        if not storage.exists(IMAGE_NAME):
+            storage.save(IMAGE_NAME, ContentFile(image_content()))
+        authors = cumulative(zipf_weights(len(author_ids), 1.1))
+        start = Recipe.objects.count()
+        self.bulk(Recipe, (
+            Recipe(
+                author_id=self.rng.choices(author_ids, cum_weights=authors)[0],
+                name=f'Рецепт {index}',
+                text='Нарезать, смешать и запечь до готовности.',
+                cooking_time=self.rng.randint(5, 180),
+                image=IMAGE_NAME
+            )
+            for index in range(start, start + self.recipes)
+        ))
+        return list(Recipe.objects.order_by('-id').values_list(
+            'id', flat=True
+        )[:self.recipes])
+
+    def create_ingredients(self, recipe_ids):
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        self.rng.shuffle(ingredient_ids)
+        weights = cumulative(zipf_weights(len(ingredient_ids)))
+        self.bulk(IngredientRecipe, (
+            IngredientRecipe(
+                recipe_id=recipe_id, ingredient_id=ingredient_id,
+                amount=self.rng.choice((1, 2, 5, 10, 50, 100, 200, 500))
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in sample(
+                self.rng, ingredient_ids, weights,
+                round(self.rng.triangular(3, 15, 7))
+            )
+        ))
+
+    def create_tags(self, recipe_ids):
+        tag_ids = list(Tag.objects.values_list('id', flat=True))
+        weights = cumulative(zipf_weights(len(tag_ids), 0.5))
+        self.bulk(TagRecipe, (
+            TagRecipe(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in sample(
+                self.rng, tag_ids, weights, self.rng.randint(1, 2)
+            )
+        ))
+
+    def create_links(self, model, user_ids, targets, count, field):
+        weights = cumulative(zipf_weights(len(targets)))
+        self.bulk(model, (
+            model(user_id=user_id, **{f'{field}_id': target})
+            for user_id in user_ids
+            for target in sample(
+                self.rng, targets, weights,
+                self.rng.randint(0, 2 * count)
+            )
+            if target != user_id or field != 'author'
+        ))
+
+    def generate(self):
+        call_command('load_data', stdout=self.stdout)
+        user_ids = self.create_users()
+        recipe_ids = self.create_recipes(user_ids)
+        self.rng.shuffle(recipe_ids)
+        self.create_ingredients(recipe_ids)
+        self.create_tags(recipe_ids)
+        self.create_links(
+            Favorite, user_ids, recipe_ids, self.favorites, 'recipe'
+        )
+        self.create_links(
+            ShoppingCart, user_ids, recipe_ids, self.carts, 'recipe'
+        )
+        self.create_links(
+            Subscribe, user_ids, user_ids, self.follows, 'author'
+        )
+        call_command('recount', stdout=self.stdout)
+        return user_ids, recipe_ids
@@ -0,0 +1,137 @@
+import asyncio
+import gc
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from benchmarks.environment import temporary_database
+from benchmarks.generator import DataGenerator
+from recipes.models import Ingredient, Recipe
+from users.models import Subscribe
+
+ASYNC_URLCONF = 'benchmarks.urls'
+
+
+def read_urls(count):
+    """
+    Запросы к эндпоинтам чтения по кругу: списки, детали рецептов,
+    поиск ингредиентов и подписки.
+    """
+    recipes = list(Recipe.objects.values_list('id', flat=True)[:100])
+    prefixes = sorted({
+        name[:2] for name in
+        Ingredient.objects.values_list('name', flat=True)[:100]
+    })
+    urls = [
+        '/api/recipes/?limit=6',
+        '/api/recipes/?limit=6&page=2',
+        '/api/tags/',
+        '/api/users/subscriptions/?limit=6&recipes_limit=3',
+    ]
+    urls += [f'/api/recipes/{recipe}/' for recipe in recipes[:10]]
+    urls += [f'/api/ingredients/?name={prefix}' for prefix in prefixes[:6]]
+    return list(islice(cycle(urls), count))
+
+
+def run_wsgi(urls, token, concurrency):
+    """
+    Синхронные представления: concurrency потоков, как у воркера
+    с потоками, каждый со своим соединением с базой.
+    """
+    def worker(part):
+        client = Client(HTTP_AUTHORIZATION=f'Token {token}')
+        try:
+            for url in part:
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise RuntimeError(f'{url}: {response.status_code}')
+        finally:
+            connections.close_all()
+
+    parts = [urls[index::concurrency] for index in range(concurrency)]
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, parts))
+
+
+def run_asgi(urls, token, concurrency):
+    """
+    Асинхронные представления в одном цикле событий: concurrency
+    одновременных запросов и пул из concurrency потоков для ORM.
+    """
+    async def main():
+        loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(concurrency)
+        loop.set_default_executor(pool)
+        # AsyncClient в Django 3.2 передает заголовки только
+        # из аргументов запроса.
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(url):
+            async with semaphore:
+                response = await client.get(
+                    url, authorization=f'Token {token}'
+                )
+            if response.status_code != 200:
+                raise RuntimeError(f'{url}: {response.status_code}')
+
+        await asyncio.gather(*(fetch(url) for url in urls))
+        await loop.run_in_executor(None, connections.close_all)
+        pool.shutdown(wait=True)
+
+    with override_settings(ROOT_URLCONF=ASYNC_URLCONF):
+        asyncio.run(main())
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность эндпоинтов чтения '
+        'при синхронном (WSGI) и асинхронном (ASGI) обслуживании '
+        'с одинаковым числом потоков и соединений с базой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def measure(self, title, run, urls, token, concurrency):
+        run(urls[:concurrency * 2], token, concurrency)
+        gc.collect()
+        start = time.perf_counter()
+        run(urls, token, concurrency)
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        tracemalloc.start()
+        run(urls, token, concurrency)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stdout.write(
+            f'{title:<6} {len(urls) / elapsed:8.1f} запросов/с  '
+            f'пик памяти {peak / 2 ** 20:6.1f} МБ'
+        )
+
+    def handle(self, *args, **options):
+        with temporary_database():
+            DataGenerator(
+                options['users'], options['recipes'],
+                seed=options['seed'], stdout=self.stdout
+            ).generate()
+            reader = Subscribe.objects.values_list(
+                'user', flat=True
+            ).first()
+            token, _ = Token.objects.get_or_create(user_id=reader)
+            urls = read_urls(options['requests'])
+            for title, run in (('WSGI', run_wsgi), ('ASGI', run_asgi)):
+                self.measure(
+                    title, run, urls, token.key, options['concurrency']
+                )
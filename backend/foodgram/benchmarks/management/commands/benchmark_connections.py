@@ -0,0 +1,134 @@
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from rest_framework.authtoken.models import Token
+
+from benchmarks.environment import temporary_database
+from benchmarks.generator import DataGenerator
+from recipes.models import Recipe
+from users.models import User
+
+
+class ConnectionCounter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def __call__(self, **kwargs):
+        with self.lock:
+            self.count += 1
+
+
+def environ(url, token):
+    path, _, query = url.partition('?')
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_AUTHORIZATION': f'Token {token}',
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+    }
+
+
+def run(handler, urls, token, concurrency):
+    """
+    Запросы через WSGIHandler в concurrency потоках, как у gunicorn
+    с потоками: сигналы request_started и request_finished
+    закрывают или проверяют соединения так же, как в работе.
+    """
+    def start_response(status, headers):
+        if not status.startswith('200'):
+            raise RuntimeError(status)
+
+    def worker(part):
+        try:
+            for url in part:
+                response = handler(environ(url, token), start_response)
+                b''.join(response)
+                response.close()
+        finally:
+            connections.close_all()
+
+    parts = [urls[index::concurrency] for index in range(concurrency)]
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, parts))
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает запросы в секунду без постоянных соединений '
+        'и с CONN_MAX_AGE (с проверкой перед запросом и без нее) '
+        'во временной тестовой базе, рассчитан на локальный PostgreSQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--recipes', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--max-age', type=int, default=60)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        config = connection.settings_dict
+        saved = {
+            key: config.get(key)
+            for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')
+        }
+        counter = ConnectionCounter()
+        connection_created.connect(counter)
+        try:
+            with temporary_database():
+                DataGenerator(
+                    options['users'], options['recipes'],
+                    seed=options['seed'], stdout=self.stdout
+                ).generate()
+                self.stdout.write(
+                    f'База: {connection.vendor}, потоков: '
+                    f'{options["concurrency"]}'
+                )
+                self.compare(config, counter, options)
+        finally:
+            connection_created.disconnect(counter)
+            config.update(saved)
+
+    def compare(self, config, counter, options):
+        token, _ = Token.objects.get_or_create(user=User.objects.first())
+        recipes = Recipe.objects.values_list('id', flat=True)[:20]
+        urls = list(islice(cycle([
+            '/api/users/me/', '/api/tags/',
+            *(f'/api/recipes/{recipe}/' for recipe in recipes),
+        ]), options['requests']))
+        handler = WSGIHandler()
+        max_age = options['max_age']
+        for title, conn_max_age, health_checks in (
+            ('без постоянных соединений', 0, False),
+            (f'CONN_MAX_AGE={max_age}', max_age, False),
+            (f'CONN_MAX_AGE={max_age} с проверкой', max_age, True),
+        ):
+            config['CONN_MAX_AGE'] = conn_max_age
+            config['CONN_HEALTH_CHECKS'] = health_checks
+            connections.close_all()
+            run(handler, urls[:options['concurrency'] * 2], token.key,
+                options['concurrency'])
+            counter.count = 0
+            start = time.perf_counter()
+            run(handler, urls, token.key, options['concurrency'])
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{title:<32} {len(urls) / elapsed:8.1f} запросов/с  '
+                f'новых соединений: {counter.count}'
+            )
@@ -0,0 +1,94 @@
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from benchmarks.environment import temporary_database
+from benchmarks.generator import DataGenerator
+from users.models import Subscribe, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет /api/recipes/feed/ на синтетических данных во временной '
+        'тестовой базе: первая страница без кэша и из кэша, следующие '
+        'страницы по курсору.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--follows', type=int, default=10_000)
+        parser.add_argument('--authors', type=int, default=50_000)
+        parser.add_argument('--recipes', type=int, default=1_000_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def seed(self, options):
+        """
+        Авторы и рецепты из DataGenerator, читатель подписан
+        на --follows случайных авторов.
+        """
+        generator = DataGenerator(
+            users=max(options['authors'], options['follows']) + 1,
+            recipes=options['recipes'], seed=options['seed'],
+            batch_size=options['batch_size'], stdout=self.stdout
+        )
+        reader, *author_ids = sorted(generator.create_users())
+        generator.create_recipes(author_ids)
+        generator.bulk(Subscribe, (
+            Subscribe(user_id=reader, author_id=author_id)
+            for author_id in generator.rng.sample(
+                author_ids, options['follows']
+            )
+        ))
+        return User.objects.get(id=reader)
+
+    def measure(self, client, url, repeat, clear_cache):
+        timings = []
+        for _ in range(repeat):
+            if clear_cache:
+                cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+        return response, statistics.median(timings), len(queries)
+
+    def report(self, title, timing, queries):
+        self.stdout.write(
+            f'{title:<28} {timing:9.2f} мс  запросов: {queries}'
+        )
+
+    def handle(self, *args, **options):
+        with temporary_database():
+            start = time.perf_counter()
+            reader = self.seed(options)
+            self.stdout.write(
+                f'Данные созданы за {time.perf_counter() - start:.1f} с: '
+                f'подписок {options["follows"]}, '
+                f'рецептов {options["recipes"]}'
+            )
+            client = APIClient()
+            client.force_authenticate(reader)
+            url = '/api/recipes/feed/'
+            response, timing, queries = self.measure(
+                client, url, options['repeat'], clear_cache=True
+            )
+            self.report('Первая страница, без кэша', timing, queries)
+            _, timing, queries = self.measure(
+                client, url, options['repeat'], clear_cache=False
+            )
+            self.report('Первая страница, из кэша', timing, queries)
+            next_url = response.data['next']
+            for page in range(2, 5):
+                if not next_url:
+                    break
+                response, timing, queries = self.measure(
+                    client, next_url, options['repeat'], clear_cache=False
+                )
+                self.report(f'Страница {page} по курсору', timing, queries)
+                next_url = response.data['next']
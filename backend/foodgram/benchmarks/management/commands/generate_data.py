@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.generator import DataGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает синтетических пользователей, рецепты, избранное, списки '
+        'покупок и подписки для нагрузочного тестирования.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Среднее число рецептов в избранном пользователя'
+        )
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='Среднее число рецептов в списке покупок'
+        )
+        parser.add_argument(
+            '--follows', type=int, default=10,
+            help='Среднее число подписок пользователя'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        DataGenerator(
+            options['users'], options['recipes'], options['favorites'],
+            options['carts'], options['follows'], seed=options['seed'],
+            batch_size=options['batch_size'], stdout=self.stdout
+        ).generate()
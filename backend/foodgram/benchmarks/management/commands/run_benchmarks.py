@@ -0,0 +1,170 @@
+import json
+import platform
+import random
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from benchmarks.environment import temporary_database
+from benchmarks.generator import DataGenerator
+from benchmarks.scenarios import (SCENARIOS, initial_state, run_mixed,
+                                  run_scenario)
+from recipes.models import ShoppingCart
+from users.models import User
+
+SIZE_OPTIONS = ('users', 'recipes', 'favorites', 'carts', 'follows', 'seed')
+
+
+def regressions(results, baseline, threshold, min_delta):
+    """
+    Сценарии, у которых p95 вырос больше чем на threshold (и не меньше
+    чем на min_delta мс) или увеличилось число запросов.
+    """
+    found = []
+    for name, current in results['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            continue
+        limit = previous['p95_ms'] + max(
+            previous['p95_ms'] * threshold, min_delta
+        )
+        if current['p95_ms'] > limit:
+            found.append(
+                f'{name}: p95 {current["p95_ms"]} мс, '
+                f'базовое {previous["p95_ms"]} мс'
+            )
+        if current['queries'] > previous['queries']:
+            found.append(
+                f'{name}: запросов {current["queries"]}, '
+                f'базовое {previous["queries"]}'
+            )
+    return found
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует синтетические данные во временной тестовой базе '
+        '(SQLite или локальный PostgreSQL), замеряет сценарии API '
+        'и сравнивает перцентили и число запросов с базовым JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--favorites', type=int, default=20)
+        parser.add_argument('--carts', type=int, default=5)
+        parser.add_argument('--follows', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--mixed', type=int, default=200,
+            help='Число запросов смешанной нагрузки, 0 — не запускать'
+        )
+        parser.add_argument(
+            '--scenario', action='append',
+            choices=[scenario.name for scenario in SCENARIOS],
+            help='Запустить только указанные сценарии'
+        )
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Файл для результатов запуска'
+        )
+        parser.add_argument(
+            '--baseline', help='Базовый JSON для сравнения'
+        )
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать результаты в --baseline вместо сравнения'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.25,
+            help='Допустимый относительный рост p95'
+        )
+        parser.add_argument(
+            '--min-delta', type=float, default=5.0,
+            help='Рост p95 в мс, который не считается регрессией'
+        )
+
+    def run(self, options):
+        DataGenerator(
+            *(options[option] for option in SIZE_OPTIONS[:5]),
+            seed=options['seed'], stdout=self.stdout
+        ).generate()
+        reader = User.objects.get(id=ShoppingCart.objects.values(
+            'user'
+        ).annotate(total=Count('id')).order_by('-total').values(
+            'user'
+        )[:1])
+        client = APIClient()
+        client.force_authenticate(reader)
+        state = initial_state()
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options['scenario'] or scenario.name in options['scenario']
+        ]
+        results = {}
+        for scenario in scenarios:
+            results[scenario.name] = run_scenario(
+                client, scenario, state, options['repeat'], options['warmup']
+            )
+            self.report(scenario.name, results[scenario.name])
+        if options['mixed']:
+            results['mixed'] = run_mixed(
+                client, scenarios, state, options['mixed'],
+                random.Random(options['seed'])
+            )
+            self.report('mixed', results['mixed'])
+        return results
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'{name:<24} p50 {result["p50_ms"]:8.2f} мс  '
+            f'p95 {result["p95_ms"]:8.2f} мс  '
+            f'p99 {result["p99_ms"]:8.2f} мс  '
+            f'запросов {result["queries"]}'
+        )
+
+    def handle(self, *args, **options):
+        if options['save_baseline'] and not options['baseline']:
+            raise CommandError('--save-baseline требует --baseline')
+        with temporary_database():
+            scenarios = self.run(options)
+        results = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'repeat': options['repeat'],
+                **{option: options[option] for option in SIZE_OPTIONS},
+            },
+            'scenarios': scenarios,
+        }
+        path = options['output']
+        if options['save_baseline']:
+            path = options['baseline']
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+        self.stdout.write(f'Результаты записаны в {path}')
+        if options['save_baseline'] or not options['baseline']:
+            return
+        with open(options['baseline'], encoding='utf-8') as file:
+            baseline = json.load(file)
+        for option in ('database', *SIZE_OPTIONS):
+            if baseline['meta'].get(option) != results['meta'][option]:
+                self.stderr.write(
+                    f'Параметр {option} отличается от базового запуска'
+                )
+        found = regressions(
+            results, baseline, options['threshold'], options['min_delta']
+        )
+        if found:
+            raise CommandError(
+                'Регрессия производительности:\n' + '\n'.join(found)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
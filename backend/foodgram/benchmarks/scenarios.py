@@ -0,0 +1,163 @@
+import base64
+import gc
+import statistics
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.generator import image_content
+from recipes.models import Ingredient, Recipe, Tag
+
+Scenario = namedtuple('Scenario', 'name weight request')
+
+
+def recipes_list(client, state):
+    return client.get('/api/recipes/', {'limit': 6})
+
+
+def recipes_list_filtered(client, state):
+    return client.get('/api/recipes/', {
+        'limit': 6, 'tags': state['tags'][:2], 'is_favorited': 1
+    })
+
+
+def recipe_retrieve(client, state):
+    state['cursor'] = (state['cursor'] + 1) % len(state['recipes'])
+    return client.get(f'/api/recipes/{state["recipes"][state["cursor"]]}/')
+
+
+def recipe_create(client, state):
+    return client.post('/api/recipes/', {
+        'name': 'Новый рецепт',
+        'text': 'Смешать и подать.',
+        'cooking_time': 15,
+        'tags': state['tag_ids'][:2],
+        'ingredients': [
+            {'id': ingredient, 'amount': 10}
+            for ingredient in state['ingredients'][:8]
+        ],
+        'image': state['image'],
+    }, format='json')
+
+
+def download_shopping_cart(client, state):
+    response = client.get('/api/recipes/download_shopping_cart/')
+    b''.join(response.streaming_content)
+    return response
+
+
+def subscriptions_list(client, state):
+    return client.get('/api/users/subscriptions/', {
+        'limit': 6, 'recipes_limit': 3
+    })
+
+
+def ingredient_search(client, state):
+    state['prefix'] = (state['prefix'] + 1) % len(state['prefixes'])
+    return client.get('/api/ingredients/', {
+        'name': state['prefixes'][state['prefix']]
+    })
+
+
+def recipes_feed(client, state):
+    return client.get('/api/recipes/feed/', {'limit': 6})
+
+
+SCENARIOS = [
+    Scenario('recipes_list', 10, recipes_list),
+    Scenario('recipes_list_filtered', 3, recipes_list_filtered),
+    Scenario('recipe_retrieve', 10, recipe_retrieve),
+    Scenario('recipe_create', 1, recipe_create),
+    Scenario('download_shopping_cart', 1, download_shopping_cart),
+    Scenario('subscriptions_list', 2, subscriptions_list),
+    Scenario('ingredient_search', 5, ingredient_search),
+    Scenario('recipes_feed', 4, recipes_feed),
+]
+
+
+def initial_state():
+    return {
+        'recipes': list(Recipe.objects.values_list('id', flat=True)[:500]),
+        'cursor': 0,
+        'tags': list(Tag.objects.values_list('slug', flat=True)),
+        'tag_ids': list(Tag.objects.values_list('id', flat=True)),
+        'ingredients': list(
+            Ingredient.objects.values_list('id', flat=True)[:50]
+        ),
+        'prefixes': sorted({
+            name[:2] for name in Ingredient.objects.values_list(
+                'name', flat=True
+            )[:200]
+        }),
+        'prefix': 0,
+        'image': 'data:image/jpeg;base64,' + base64.b64encode(
+            image_content()
+        ).decode(),
+    }
+
+
+def measure(client, scenario, state):
+    """
+    Время (мс) и число SQL-запросов одного запроса сценария.
+    Кэш очищается заранее: замеряется путь до базы.
+    """
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        response = scenario.request(client, state)
+        elapsed = (time.perf_counter() - start) * 1000
+    if response.status_code >= 400:
+        raise RuntimeError(
+            f'{scenario.name}: ответ {response.status_code}'
+        )
+    return elapsed, len(queries)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(timings, queries):
+    return {
+        'requests': len(timings),
+        'p50_ms': round(percentile(timings, 0.5), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'queries': max(queries),
+    }
+
+
+def run_scenario(client, scenario, state, repeat, warmup):
+    gc.collect()
+    for _ in range(warmup):
+        measure(client, scenario, state)
+    timings, queries = [], []
+    for _ in range(repeat):
+        elapsed, count = measure(client, scenario, state)
+        timings.append(elapsed)
+        queries.append(count)
+    return summarize(timings, queries)
+
+
+def run_mixed(client, scenarios, state, requests, rng):
+    """
+    Смешанная нагрузка в духе locust: сценарии выбираются случайно
+    с весами weight.
+    """
+    timings, queries = [], []
+    weights = [scenario.weight for scenario in scenarios]
+    start = time.perf_counter()
+    for scenario in rng.choices(scenarios, weights=weights, k=requests):
+        elapsed, count = measure(client, scenario, state)
+        timings.append(elapsed)
+        queries.append(count)
+    result = summarize(timings, queries)
+    result['throughput_rps'] = round(
+        requests / (time.perf_counter() - start), 1
+    )
+    return result
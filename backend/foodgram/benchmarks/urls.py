@@ -0,0 +1,8 @@
+from django.urls import include, path
+
+from api.urls import async_urlpatterns
+
+urlpatterns = [
+    path('api/', include(async_urlpatterns)),
+    path('', include('foodgram.urls')),
+]
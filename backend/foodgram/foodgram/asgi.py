@@ -0,0 +1,16 @@
+"""
+ASGI config for foodgram project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Read endpoints are wrapped by api.async_views.async_view and run in a
+thread pool, so slow database calls do not block other requests.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+os.environ.setdefault('ASYNC_READ_VIEWS', 'True')
+
+application = get_asgi_application()
@@ -26,10 +26,18 @@ INSTALLED_APPS = [
     'djoser',
     'users.apps.UsersConfig',
     'recipes.apps.RecipesConfig',
-    'api'
+    'api',
 ]
 
+BENCHMARKS = os.getenv(
+    'BENCHMARKS', default='True' if DEBUG else 'False'
+) == 'True'
+if BENCHMARKS:
+    INSTALLED_APPS.append('benchmarks.apps.BenchmarksConfig')
+
 MIDDLEWARE = [
+    'api.metrics.QueryMetricsMiddleware',
+    'api.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,6 +67,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+DB_CONN_MAX_AGE = os.getenv('DB_CONN_MAX_AGE', default='60')
+DB_POOLER = os.getenv('DB_POOLER', default='')
+DB_STATEMENT_TIMEOUT = int(os.getenv('DB_STATEMENT_TIMEOUT', default=0))
+
 if DEBUG:
     DATABASES = {
         'default': {
@@ -74,9 +86,82 @@ else:
             'USER': os.getenv('POSTGRES_USER', default='postgres'),
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
             'HOST': os.getenv('DB_HOST', default='db'),
-            'PORT': os.getenv('DB_PORT', default='5432')
+            'PORT': os.getenv('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': (
+                None if DB_CONN_MAX_AGE == 'None' else int(DB_CONN_MAX_AGE)
+            ),
+            'CONN_HEALTH_CHECKS': os.getenv(
+                'DB_CONN_HEALTH_CHECKS', default='True'
+            ) == 'True',
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+                'DB_DISABLE_SERVER_SIDE_CURSORS',
+                default=str(DB_POOLER == 'pgbouncer')
+            ) == 'True',
+            'OPTIONS': {
+                'connect_timeout': int(
+                    os.getenv('DB_CONNECT_TIMEOUT', default=5)
+                ),
+            },
+        }
+    }
+    if DB_STATEMENT_TIMEOUT and DB_POOLER != 'pgbouncer':
+        DATABASES['default']['OPTIONS']['options'] = (
+            f'-c statement_timeout={DB_STATEMENT_TIMEOUT}'
+        )
+    for index, address in enumerate(
+        os.getenv('DB_REPLICA_HOSTS', default='').split(), start=1
+    ):
+        host, _, port = address.partition(':')
+        DATABASES[f'replica{index}'] = {
+            **DATABASES['default'],
+            'HOST': host,
+            'PORT': port or DATABASES['default']['PORT'],
+            'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+            'TEST': {'MIRROR': 'default'},
         }
+
+DB_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DB_REPLICA_SELECTION = os.getenv(
+    'DB_REPLICA_SELECTION', default='round_robin'
+)
+DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', default=5))
+DB_REPLICA_LAG_INTERVAL = float(
+    os.getenv('DB_REPLICA_LAG_INTERVAL', default=5)
+)
+DB_REPLICA_STICKY_SECONDS = int(
+    os.getenv('DB_REPLICA_STICKY_SECONDS', default=10)
+)
+DB_REPLICA_VIEWS = (
+    'tags-list', 'tags-detail', 'ingredients-list', 'ingredients-detail',
+    'recipes-list', 'recipes-detail', 'subscriptions',
+)
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
     }
+}
+
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+FEED_CACHE_TIMEOUT = int(os.getenv('FEED_CACHE_TIMEOUT', default=30))
+
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', default='False') == 'True'
+
+API_METRICS = os.getenv('API_METRICS', default='False') == 'True'
+API_METRICS_WINDOW = int(os.getenv('API_METRICS_WINDOW', default=1000))
+API_METRICS_DUPLICATE_THRESHOLD = int(
+    os.getenv('API_METRICS_DUPLICATE_THRESHOLD', default=3)
+)
+
+API_ORJSON = os.getenv('API_ORJSON', default='False') == 'True'
+API_COMPILED_SERIALIZERS = os.getenv(
+    'API_COMPILED_SERIALIZERS', default='False'
+) == 'True'
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -101,6 +186,17 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.TokenAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer' if API_ORJSON
+        else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser' if API_ORJSON
+        else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 DJOSER = {
@@ -134,6 +230,19 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', default=2))
+IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', default=82))
+
+RECIPE_IMAGE_MAX_SIZE = int(
+    os.getenv('RECIPE_IMAGE_MAX_SIZE', default=10 * 1024 * 1024)
+)
+
+RECIPE_TRENDING_HALF_LIFE_HOURS = float(
+    os.getenv('RECIPE_TRENDING_HALF_LIFE_HOURS', default=72)
+)
+
+RECOMMENDATIONS_TOP_K = int(os.getenv('RECOMMENDATIONS_TOP_K', default=20))
+
 EMAILFIELD_254 = 254
 CHARFIELD_200 = 200
 CHARFIELD_150 = 150
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.search import search_recipes
 
 
 class Ingredients(admin.TabularInline):
@@ -20,12 +21,14 @@ class RecipeAdmin(admin.ModelAdmin):
     list_filter = ('author', 'name', 'tags',)
     inlines = (Ingredients,)
 
+    def get_search_results(self, request, queryset, search_term):
+        return search_recipes(queryset, search_term), False
+
     def favorites(self, obj):
-        if obj.favorites.exists():
-            return obj.favorites.count()
-        return 0
+        return obj.favorites_count
 
     favorites.short_description = 'Избранное'
+    favorites.admin_order_field = 'favorites_count'
 
     def amount_ingredients(self, obj):
         if obj.ingredients.exists():
@@ -0,0 +1,110 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS = {
+    'thumbnail': (320, 320),
+    'medium': (960, 960),
+}
+FORMATS = {
+    'jpeg': 'JPEG',
+    'webp': 'WEBP',
+}
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_WORKERS, thread_name_prefix='renditions'
+)
+
+renditions_made = Signal()
+
+
+def rendition_name(image_name, size, extension):
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return f'recipes/renditions/{stem}_{size}.{extension}'
+
+
+def rendition_urls(recipe):
+    """
+    URL всех уменьшенных копий или None, если они еще не готовы.
+    """
+    if not recipe.renditions_ready:
+        return None
+    return image_rendition_urls(recipe.image.name)
+
+
+def image_rendition_urls(image_name):
+    return {
+        size: {
+            extension: default_storage.url(
+                rendition_name(image_name, size, extension)
+            )
+            for extension in FORMATS
+        }
+        for size in RENDITIONS
+    }
+
+
+def _to_rgb(image):
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def make_renditions(recipe):
+    """
+    Сохраняет уменьшенные копии изображения рецепта в JPEG и WebP
+    и отмечает рецепт, если изображение за это время не сменилось.
+    update() не отправляет post_save, поэтому об отметке сообщает
+    сигнал renditions_made.
+    """
+    with recipe.image.open('rb') as file:
+        image = _to_rgb(ImageOps.exif_transpose(Image.open(file)))
+    for size, box in RENDITIONS.items():
+        copy = image.copy()
+        copy.thumbnail(box, Image.LANCZOS)
+        for extension, image_format in FORMATS.items():
+            buffer = BytesIO()
+            copy.save(buffer, image_format, quality=settings.IMAGE_QUALITY)
+            name = rendition_name(recipe.image.name, size, extension)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+    updated = Recipe.objects.filter(
+        pk=recipe.pk, image=recipe.image.name
+    ).update(renditions_ready=True, updated_at=timezone.now())
+    if updated:
+        renditions_made.send(sender=Recipe, recipe_id=recipe.pk)
+
+
+def _process(pk):
+    try:
+        recipe = Recipe.objects.filter(pk=pk).first()
+        if recipe is not None:
+            make_renditions(recipe)
+    except Exception:
+        logger.exception('Не удалось обработать изображение рецепта %s', pk)
+    finally:
+        connections.close_all()
+
+
+def schedule_renditions(pk):
+    """
+    Ставит обработку изображения в пул потоков, вне потока запроса.
+    """
+    executor.submit(_process, pk)
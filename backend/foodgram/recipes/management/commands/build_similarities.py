@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import build_similarities
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит похожие рецепты по совместному добавлению в избранное. '
+        'Без --full пересчитывает только рецепты, затронутые изменениями '
+        'после прошлого запуска.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать похожие для всех рецептов.'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        built = build_similarities(
+            full=options['full'], batch_size=options['batch_size']
+        )
+        self.stdout.write(f'Пересчитано рецептов: {built}')
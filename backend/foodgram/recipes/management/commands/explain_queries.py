@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from api.exports import shopping_list
+from api.filters import RecipeFilter
+from recipes.models import Recipe, Tag
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Выводит планы выполнения (EXPLAIN) для списковых запросов API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int,
+            help='id пользователя для фильтров избранного и покупок'
+        )
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Выполнить запросы (EXPLAIN ANALYZE, только PostgreSQL)'
+        )
+
+    def recipe_filter(self, data, user):
+        queryset = Recipe.objects.with_related().with_user_flags(user)
+        return RecipeFilter(
+            data, queryset=queryset, request=SimpleNamespace(user=user)
+        ).qs[:6]
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.get(id=options['user'])
+        else:
+            user = User.objects.order_by('id').first()
+        if user is None:
+            self.stderr.write('В базе нет пользователей')
+            return
+        tag = Tag.objects.values_list('slug', flat=True).first()
+        queries = {
+            'Рецепты': self.recipe_filter({}, user),
+            'Рецепты по тегу': self.recipe_filter({'tags': [tag]}, user),
+            'Избранное': self.recipe_filter({'is_favorited': True}, user),
+            'Список покупок': self.recipe_filter(
+                {'is_in_shopping_cart': True}, user
+            ),
+            'Рецепты автора': Recipe.objects.filter(author=user)[:3],
+            'Подписки': User.objects.filter(following__user=user)[:6],
+            'Выгрузка списка покупок': shopping_list(user),
+        }
+        explain_options = {'analyze': True} if options['analyze'] else {}
+        for title, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write('')
@@ -0,0 +1,120 @@
+import csv
+import json
+import os
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import Ingredient, Tag
+from recipes.search import ingredient_index
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'recipes', 'data')
+MODELS = {
+    'ingredients': (
+        Ingredient, ('name', 'measurement_unit'), ('name', 'measurement_unit')
+    ),
+    'tags': (Tag, ('name', 'color', 'slug'), ('slug',)),
+}
+
+
+def read_rows(path, fields):
+    """
+    Построчно читает CSV или JSON-массив и отдает словари с полями модели.
+    """
+    with open(path, encoding='utf-8') as file:
+        if path.endswith('.json'):
+            for item in json.load(file):
+                yield {field: item[field] for field in fields}
+            return
+        for row in csv.reader(file):
+            if row:
+                yield dict(zip(fields, (value.strip() for value in row)))
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    batch = list(islice(rows, size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, size))
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает ингредиенты и теги из CSV или JSON пакетами, '
+        'уже существующие записи пропускаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Файлы для загрузки, по умолчанию recipes/data/*.csv'
+        )
+        parser.add_argument(
+            '--model', choices=MODELS,
+            help='Модель для загрузки, по умолчанию определяется по имени '
+                 'файла (ingredients.csv, tags.csv)'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать новые и пропущенные записи'
+        )
+
+    def get_model(self, path, name):
+        name = name or os.path.splitext(os.path.basename(path))[0]
+        if name not in MODELS:
+            raise CommandError(
+                f'Не удалось определить модель для {path}, укажите --model'
+            )
+        return MODELS[name]
+
+    def load_batch(self, model, key_fields, batch, seen, dry_run):
+        keys = [tuple(row[field] for field in key_fields) for row in batch]
+        lookup = {f'{key_fields[0]}__in': {key[0] for key in keys}}
+        existing = set(
+            model.objects.filter(**lookup).values_list(*key_fields)
+        )
+        new = []
+        for key, row in zip(keys, batch):
+            if key not in existing and key not in seen:
+                seen.add(key)
+                new.append(model(**row))
+        if not new or dry_run:
+            return len(new)
+        # С ignore_conflicts bulk_create не сообщает, какие строки
+        # пропущены, поэтому добавленные считаются по разнице числа строк.
+        with transaction.atomic():
+            before = model.objects.filter(**lookup).count()
+            model.objects.bulk_create(new, ignore_conflicts=True)
+            return model.objects.filter(**lookup).count() - before
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or [
+            os.path.join(DATA_DIR, 'ingredients.csv'),
+            os.path.join(DATA_DIR, 'tags.csv'),
+        ]
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше 0')
+        for path in paths:
+            model, fields, key_fields = self.get_model(
+                path, options['model']
+            )
+            inserted = skipped = 0
+            seen = set()
+            for batch in batches(
+                read_rows(path, fields), options['batch_size']
+            ):
+                created = self.load_batch(
+                    model, key_fields, batch, seen, options['dry_run']
+                )
+                inserted += created
+                skipped += len(batch) - created
+            if model is Ingredient and inserted and not options['dry_run']:
+                ingredient_index.invalidate()
+            prefix = 'Будет добавлено' if options['dry_run'] else 'Добавлено'
+            self.stdout.write(self.style.SUCCESS(
+                f'{path}: {prefix} {inserted}, пропущено {skipped}'
+            ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import make_renditions
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создает уменьшенные копии изображений существующих рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать копии и для уже обработанных рецептов'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='').only('id', 'image')
+        if not options['all']:
+            recipes = recipes.filter(renditions_ready=False)
+        done = failed = 0
+        for recipe in recipes.iterator():
+            try:
+                make_renditions(recipe)
+                done += 1
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f'Рецепт {recipe.id}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано: {done}, с ошибками: {failed}'
+        ))
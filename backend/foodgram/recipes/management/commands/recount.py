@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscribe, User
+
+
+def count_of(model, field):
+    """
+    Подзапрос с числом строк model, ссылающихся на внешний объект.
+    """
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+                field
+            ).annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField()
+        ),
+        Value(0)
+    )
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счетчики рецептов и авторов.'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.update(
+            favorites_count=count_of(Favorite, 'recipe'),
+            shopping_cart_count=count_of(ShoppingCart, 'recipe')
+        )
+        users = User.objects.update(
+            recipes_count=count_of(Recipe, 'author'),
+            followers_count=count_of(Subscribe, 'author')
+        )
+        self.stdout.write(
+            f'Пересчитано рецептов: {recipes}, пользователей: {users}'
+        )
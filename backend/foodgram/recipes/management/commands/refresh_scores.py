@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from recipes.scores import refresh_scores
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинги popular и trending рецептов, '
+        'изменившихся после прошлого запуска. Запускается по расписанию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать рейтинги всех рецептов.'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        refreshed = refresh_scores(
+            full=options['full'], batch_size=options['batch_size']
+        )
+        self.stdout.write(f'Пересчитано рейтингов: {refreshed}')
@@ -0,0 +1,43 @@
+# Generated by Django 3.2 on 2026-10-18 05:03
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Повторные запуски старой загрузки дублировали ингредиенты:
+    строки рецептов переносятся на первую копию, остальные удаляются.
+    """
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(keep=Min('id'), total=Count('id')).filter(total__gt=1)
+    for group in duplicates:
+        copies = Ingredient.objects.filter(
+            name=group['name'], measurement_unit=group['measurement_unit']
+        ).exclude(id=group['keep'])
+        for row in IngredientRecipe.objects.filter(ingredient__in=copies):
+            kept = IngredientRecipe.objects.filter(
+                recipe_id=row.recipe_id, ingredient_id=group['keep']
+            ).first()
+            if kept is None:
+                row.ingredient_id = group['keep']
+                row.save(update_fields=['ingredient'])
+            else:
+                kept.amount += row.amount
+                kept.save(update_fields=['amount'])
+                row.delete()
+        copies.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 05:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='renditions_ready',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Уменьшенные копии готовы'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 3.2 on 2026-10-18 05:09
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_FORWARD = """
+CREATE INDEX recipe_search_vector_idx ON recipes_recipe
+    USING gin (search_vector);
+CREATE FUNCTION recipes_recipe_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.text, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER recipes_recipe_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, text ON recipes_recipe
+    FOR EACH ROW EXECUTE FUNCTION recipes_recipe_search_vector();
+UPDATE recipes_recipe SET name = name;
+"""
+
+POSTGRES_BACKWARD = """
+DROP TRIGGER IF EXISTS recipes_recipe_search_vector_update ON recipes_recipe;
+DROP FUNCTION IF EXISTS recipes_recipe_search_vector();
+DROP INDEX IF EXISTS recipe_search_vector_idx;
+"""
+
+
+def postgres_only(sql):
+    """
+    Индекс GIN и триггер tsvector нужны только в PostgreSQL,
+    для SQLite индекс FTS5 создается после миграций.
+    """
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_renditions_ready'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            postgres_only(POSTGRES_FORWARD), postgres_only(POSTGRES_BACKWARD)
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 3.2 on 2026-10-18 05:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSimilarity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+            ],
+            options={
+                'verbose_name': 'Похожий рецепт',
+                'verbose_name_plural': 'Похожие рецепты',
+            },
+        ),
+        migrations.CreateModel(
+            name='SimilarityState',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similarity_state', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('favorites', models.PositiveIntegerField(verbose_name='Добавлений в избранное')),
+                ('computed_at', models.DateTimeField(verbose_name='Дата расчета')),
+            ],
+            options={
+                'verbose_name': 'Состояние расчета похожих рецептов',
+                'verbose_name_plural': 'Состояния расчета похожих рецептов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='similaritystate',
+            index=models.Index(fields=['computed_at'], name='similarity_computed_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='recipesimilarity',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='recipes.recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AddField(
+            model_name='recipesimilarity',
+            name='similar',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to', to='recipes.recipe', verbose_name='Похожий рецепт'),
+        ),
+        migrations.AddIndex(
+            model_name='recipesimilarity',
+            index=models.Index(fields=['recipe', '-score'], name='similarity_recipe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipesimilarity',
+            index=models.Index(fields=['similar', 'recipe'], name='similarity_similar_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipesimilarity',
+            constraint=models.UniqueConstraint(fields=('recipe', 'similar'), name='recipe_similar_unique'),
+        ),
+    ]
@@ -1,9 +1,11 @@
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
-from django.db.models import UniqueConstraint
+from django.db.models import (BooleanField, Exists, OuterRef, Prefetch,
+                              UniqueConstraint, Value)
 
 from recipes.validators import validate_cooking_time
-from users.models import User
+from users.models import Subscribe, User
 
 
 class Tag(models.Model):
@@ -40,11 +42,55 @@ class Ingredient(models.Model):
         verbose_name = 'Ингридиент'
         verbose_name_plural = 'Ингридиенты'
         ordering = ('name',)
+        constraints = [
+            UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='ingredient_unique'
+            )
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    """
+    Queryset рецептов для чтения: автор, теги и ингредиенты
+    загружаются фиксированным числом запросов, флаги пользователя
+    считаются подзапросами Exists.
+    """
+    def with_related(self):
+        return self.defer('search_vector').select_related(
+            'author'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredientrecipe_set',
+                queryset=IngredientRecipe.objects.select_related('ingredient')
+            )
+        )
+
+    def with_user_flags(self, user):
+        if user.is_anonymous:
+            false = Value(False, output_field=BooleanField())
+            return self.annotate(
+                is_favorited=false,
+                is_in_shopping_cart=false,
+                is_subscribed=false
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_subscribed=Exists(Subscribe.objects.filter(
+                user=user, author=OuterRef('author')
+            ))
+        )
+
+
 class Recipe(models.Model):
     """ Модель Рецепты. """
     tags = models.ManyToManyField(
@@ -67,16 +113,36 @@ class Recipe(models.Model):
         'Название рецепта', max_length=settings.CHARFIELD_200
     )
     image = models.ImageField(upload_to='recipes/')
+    renditions_ready = models.BooleanField(
+        'Уменьшенные копии готовы', default=False, editable=False
+    )
     text = models.TextField('Описание рецепта')
     cooking_time = models.PositiveSmallIntegerField(
         'Время приготовления', validators=[validate_cooking_time]
     )
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    favorites_count = models.PositiveIntegerField(
+        'Добавлений в избранное', default=0, editable=False
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        'Добавлений в список покупок', default=0, editable=False
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['-pub_date'], name='recipe_pub_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -104,6 +170,12 @@ class IngredientRecipe(models.Model):
                 name='recipe_ingredient_unique'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['ingredient', 'recipe'],
+                name='ingredient_recipe_idx'
+            ),
+        ]
 
 
 class TagRecipe(models.Model):
@@ -126,6 +198,9 @@ class TagRecipe(models.Model):
                 name='recipe_tag_unique'
             )
         ]
+        indexes = [
+            models.Index(fields=['tag', 'recipe'], name='tag_recipe_idx'),
+        ]
 
 
 class Favorite(models.Model):
@@ -142,6 +217,7 @@ class Favorite(models.Model):
         related_name='favorites',
         verbose_name='Рецепт'
     )
+    created_at = models.DateTimeField('Дата добавления', auto_now_add=True)
 
     class Meta:
         verbose_name = 'Избранное'
@@ -152,6 +228,14 @@ class Favorite(models.Model):
                 name='favorite_unique'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'user'], name='favorite_recipe_user_idx'
+            ),
+            models.Index(
+                fields=['created_at'], name='favorite_created_at_idx'
+            ),
+        ]
 
 
 class ShoppingCart(models.Model):
@@ -168,6 +252,7 @@ class ShoppingCart(models.Model):
         related_name='shoppingcart',
         verbose_name='Рецепт'
     )
+    created_at = models.DateTimeField('Дата добавления', auto_now_add=True)
 
     class Meta:
         verbose_name = 'Список покупок'
@@ -178,3 +263,102 @@ class ShoppingCart(models.Model):
                 name='shoppingcart_unique'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'user'],
+                name='shoppingcart_recipe_user_idx'
+            ),
+            models.Index(
+                fields=['created_at'], name='shoppingcart_created_at_idx'
+            ),
+        ]
+
+
+class RecipeScore(models.Model):
+    """
+    Модель Рейтинг рецепта. Заполняется командой refresh_scores.
+    """
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name='Рецепт'
+    )
+    popular = models.PositiveIntegerField('Популярность', default=0)
+    trending = models.FloatField('Тренд', null=True)
+    computed_at = models.DateTimeField('Дата расчета')
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        indexes = [
+            models.Index(fields=['-popular'], name='score_popular_idx'),
+            models.Index(fields=['-trending'], name='score_trending_idx'),
+            models.Index(
+                fields=['computed_at'], name='score_computed_at_idx'
+            ),
+        ]
+
+
+class RecipeSimilarity(models.Model):
+    """
+    Модель Похожие рецепты: ближайшие соседи рецепта по совместному
+    добавлению в избранное. Заполняется командой build_similarities.
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='neighbors',
+        verbose_name='Рецепт'
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Похожий рецепт'
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = [
+            UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='recipe_similar_unique'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'], name='similarity_recipe_idx'
+            ),
+            models.Index(
+                fields=['similar', 'recipe'], name='similarity_similar_idx'
+            ),
+        ]
+
+
+class SimilarityState(models.Model):
+    """
+    Модель Состояние расчета похожих рецептов: число добавлений
+    в избранное на момент последнего расчета.
+    """
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='similarity_state',
+        verbose_name='Рецепт'
+    )
+    favorites = models.PositiveIntegerField('Добавлений в избранное')
+    computed_at = models.DateTimeField('Дата расчета')
+
+    class Meta:
+        verbose_name = 'Состояние расчета похожих рецептов'
+        verbose_name_plural = 'Состояния расчета похожих рецептов'
+        indexes = [
+            models.Index(
+                fields=['computed_at'], name='similarity_computed_at_idx'
+            ),
+        ]
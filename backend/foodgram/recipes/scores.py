@@ -0,0 +1,129 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone as django_timezone
+
+from recipes.models import Favorite, Recipe, RecipeScore, ShoppingCart
+
+SCORE_ORDERINGS = {
+    'popular': 'score__popular',
+    'trending': 'score__trending',
+}
+TRENDING_EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def order_by_score(queryset, ordering):
+    """
+    Сортировка по предрасчитанному рейтингу, рецепты без рейтинга
+    идут последними.
+    """
+    return queryset.order_by(
+        F(SCORE_ORDERINGS[ordering]).desc(nulls_last=True), '-pub_date'
+    )
+
+
+def trending_score(timestamps, half_life):
+    """
+    Логарифм суммы exp(ln2 * (t - epoch) / half_life) по событиям.
+    Затухание к текущему моменту одинаково для всех рецептов, поэтому
+    порядок не меняется со временем и пересчитывать нужно только
+    рецепты с новыми событиями.
+    """
+    if not timestamps:
+        return None
+    rate = math.log(2) / half_life.total_seconds()
+    exponents = [
+        rate * (timestamp - TRENDING_EPOCH).total_seconds()
+        for timestamp in timestamps
+    ]
+    peak = max(exponents)
+    return peak + math.log(sum(
+        math.exp(exponent - peak) for exponent in exponents
+    ))
+
+
+def stale_recipes(watermark):
+    """
+    Рецепты, рейтинг которых устарел: с новыми добавлениями после
+    watermark, без рейтинга или с изменившимися счетчиками
+    (удаления из избранного и списка покупок).
+    """
+    stale = set()
+    for model in (Favorite, ShoppingCart):
+        stale.update(model.objects.filter(
+            created_at__gt=watermark
+        ).values_list('recipe_id', flat=True))
+    stale.update(Recipe.objects.filter(
+        score__isnull=True
+    ).values_list('id', flat=True))
+    stale.update(RecipeScore.objects.exclude(
+        popular=F('recipe__favorites_count')
+        + F('recipe__shopping_cart_count')
+    ).values_list('recipe_id', flat=True))
+    return sorted(stale)
+
+
+def _refresh_batch(recipe_ids, computed_at, half_life):
+    timestamps = {recipe_id: [] for recipe_id in recipe_ids}
+    for model in (Favorite, ShoppingCart):
+        for recipe_id, created_at in model.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'created_at'):
+            timestamps[recipe_id].append(created_at)
+    scores = [
+        RecipeScore(
+            recipe_id=recipe_id,
+            popular=favorites + cart,
+            trending=trending_score(timestamps[recipe_id], half_life),
+            computed_at=computed_at
+        )
+        for recipe_id, favorites, cart in Recipe.objects.filter(
+            id__in=recipe_ids
+        ).values_list('id', 'favorites_count', 'shopping_cart_count')
+    ]
+    with transaction.atomic():
+        existing = set(RecipeScore.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True))
+        RecipeScore.objects.bulk_update(
+            [score for score in scores if score.recipe_id in existing],
+            ('popular', 'trending', 'computed_at')
+        )
+        RecipeScore.objects.bulk_create(
+            [score for score in scores if score.recipe_id not in existing]
+        )
+    return len(scores)
+
+
+def scores_watermark():
+    """
+    Время последнего расчета рейтингов. Расчет идет в отдельном
+    процессе, поэтому версия рейтингов для кэша ответов берется
+    из базы, которую видят все процессы.
+    """
+    return RecipeScore.objects.aggregate(
+        watermark=Max('computed_at')
+    )['watermark']
+
+
+def refresh_scores(full=False, batch_size=500):
+    """
+    Пересчитывает рейтинги рецептов, изменившихся после последнего
+    расчета. Watermark — максимальное computed_at в таблице рейтингов.
+    """
+    computed_at = django_timezone.now()
+    watermark = scores_watermark()
+    if full or watermark is None:
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    else:
+        recipe_ids = stale_recipes(watermark)
+    half_life = timedelta(hours=settings.RECIPE_TRENDING_HALF_LIFE_HOURS)
+    refreshed = 0
+    for start in range(0, len(recipe_ids), batch_size):
+        refreshed += _refresh_batch(
+            recipe_ids[start:start + batch_size], computed_at, half_life
+        )
+    return refreshed
@@ -0,0 +1,207 @@
+import re
+import time
+from bisect import bisect_left
+from threading import Lock
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import (Count, F, FloatField, IntegerField, OuterRef, Q,
+                              Subquery, Value)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce
+
+from recipes.models import Ingredient, IngredientRecipe
+
+FTS_TABLE = 'recipes_recipe_fts'
+SQLITE_FTS = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, text, content='recipes_recipe', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert
+        AFTER INSERT ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, text)
+            VALUES (new.id, new.name, new.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete
+        AFTER DELETE ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, text)
+            VALUES ('delete', old.id, old.name, old.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+        AFTER UPDATE OF name, text ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, text)
+            VALUES ('delete', old.id, old.name, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, name, text)
+            VALUES (new.id, new.name, new.text);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+WORD = re.compile(r'\w+')
+INDEX_VERSION_KEY = 'recipes:ingredient-index:version'
+MIN_MATCH_RATIO = 0.5
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса для автодополнения.
+    Хранит отсортированный по названию массив, поиск по префиксу
+    выполняется бинарным поиском. Индекс строится лениво при первом
+    запросе и перестраивается, когда меняется версия в общем кэше:
+    ее увеличивает invalidate() в любом процессе.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._version = None
+        self._keys = None
+        self._items = None
+
+    def version(self):
+        version = cache.get(INDEX_VERSION_KEY)
+        if version is None:
+            cache.add(INDEX_VERSION_KEY, time.time_ns(), None)
+            return cache.get(INDEX_VERSION_KEY)
+        return version
+
+    def invalidate(self):
+        try:
+            cache.incr(INDEX_VERSION_KEY)
+        except ValueError:
+            cache.set(INDEX_VERSION_KEY, time.time_ns(), None)
+
+    def _load(self):
+        version = self.version()
+        with self._lock:
+            if self._keys is None or self._version != version:
+                rows = sorted(
+                    (name.lower(), pk, name, measurement_unit)
+                    for pk, name, measurement_unit
+                    in Ingredient.objects.values_list(
+                        'id', 'name', 'measurement_unit'
+                    )
+                )
+                self._items = [
+                    {'id': pk, 'name': name, 'measurement_unit': unit}
+                    for _, pk, name, unit in rows
+                ]
+                self._keys = [row[0] for row in rows]
+                self._version = version
+            return self._keys, self._items
+
+    def search(self, query, limit=None):
+        """
+        Сначала ингредиенты, название которых начинается с query,
+        затем те, в названии которых query встречается дальше.
+        """
+        keys, items = self._load()
+        query = query.strip().lower()
+        if not query:
+            return items[:limit]
+        start = bisect_left(keys, query)
+        end = start
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+        result = items[start:end]
+        if limit is not None and len(result) >= limit:
+            return result[:limit]
+        for position, key in enumerate(keys):
+            if query in key and not key.startswith(query):
+                result.append(items[position])
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+
+ingredient_index = IngredientIndex()
+
+
+def setup_sqlite_fts(connection):
+    """
+    Создает таблицу FTS5 и триггеры синхронизации для SQLite.
+    Вызывается после каждой миграции: перестройка таблицы рецептов
+    при изменении схемы в SQLite удаляет ее триггеры.
+    """
+    with connection.cursor() as cursor:
+        for statement in SQLITE_FTS:
+            cursor.execute(statement)
+
+
+def search_recipes(queryset, query):
+    """
+    Полнотекстовый поиск по названию и описанию рецепта,
+    результаты упорядочены по релевантности.
+    """
+    words = WORD.findall(query.lower())
+    if not words:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        search_query = SearchQuery(
+            query, config='russian', search_type='websearch'
+        )
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-rank', '-pub_date')
+    if vendor == 'sqlite':
+        match = ' '.join(f'"{word}"*' for word in words)
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (match,)
+        )).annotate(rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s '
+            f'AND {FTS_TABLE}.rowid = recipes_recipe.id',
+            (match,), output_field=FloatField()
+        )).order_by('-rank', '-pub_date')
+    condition = Q()
+    for word in words:
+        condition &= Q(name__icontains=word) | Q(text__icontains=word)
+    return queryset.filter(condition)
+
+
+def _ingredient_count(ingredients=None):
+    rows = IngredientRecipe.objects.filter(recipe=OuterRef('pk'))
+    if ingredients is not None:
+        rows = rows.filter(ingredient__in=ingredients)
+    return Coalesce(Subquery(
+        rows.order_by().values('recipe').annotate(
+            total=Count('id')
+        ).values('total'),
+        output_field=IntegerField()
+    ), Value(0))
+
+
+def match_ingredients(queryset, ingredients, mode='any',
+                      min_ratio=MIN_MATCH_RATIO):
+    """
+    Рецепты, которые можно приготовить из указанных ингредиентов.
+    all — в рецепте есть все указанные ингредиенты, any — хотя бы один,
+    ratio — указанные ингредиенты составляют не меньше min_ratio
+    ингредиентов рецепта. Рецепты упорядочены по этой доле, затем
+    по числу совпадений, затем по релевантности поиска, если queryset
+    уже отфильтрован search_recipes. Кандидаты отбираются по индексу
+    (ingredient, recipe).
+    """
+    ingredients = set(ingredients)
+    candidates = IngredientRecipe.objects.filter(
+        ingredient__in=ingredients
+    ).order_by().values('recipe')
+    if mode == 'all':
+        candidates = candidates.annotate(
+            matched=Count('ingredient')
+        ).filter(matched=len(ingredients))
+    queryset = queryset.filter(id__in=candidates.values('recipe')).annotate(
+        matched=_ingredient_count(ingredients),
+        ingredients_total=_ingredient_count()
+    ).annotate(
+        match_ratio=Cast('matched', FloatField()) / Cast(
+            'ingredients_total', FloatField()
+        )
+    )
+    if mode == 'ratio':
+        queryset = queryset.filter(match_ratio__gte=float(min_ratio))
+    ordering = ['-match_ratio', '-matched']
+    if 'rank' in queryset.query.annotations:
+        ordering.append('-rank')
+    return queryset.order_by(*ordering, '-pub_date')
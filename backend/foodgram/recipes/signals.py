@@ -0,0 +1,48 @@
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart
+from recipes.search import ingredient_index, setup_sqlite_fts
+from users.counters import update_counter
+from users.models import User
+
+COUNTERS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'shopping_cart_count',
+}
+
+
+@receiver(post_migrate)
+def create_sqlite_fts(sender, using, **kwargs):
+    if sender.name == 'recipes' and connections[using].vendor == 'sqlite':
+        setup_sqlite_fts(connections[using])
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def reset_ingredient_index(sender, using=None, **kwargs):
+    transaction.on_commit(ingredient_index.invalidate, using=using)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def increment_recipe_counter(sender, instance, created, **kwargs):
+    if created:
+        update_counter(Recipe, instance.recipe_id, COUNTERS[sender], 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def decrement_recipe_counter(sender, instance, **kwargs):
+    update_counter(Recipe, instance.recipe_id, COUNTERS[sender], -1)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        update_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    update_counter(User, instance.author_id, 'recipes_count', -1)
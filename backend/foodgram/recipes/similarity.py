@@ -0,0 +1,126 @@
+import heapq
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe, RecipeSimilarity, SimilarityState
+
+
+def co_favorites(recipe_ids):
+    """
+    Строки матрицы совместных добавлений в избранное для recipe_ids:
+    {рецепт: {соседний рецепт: число пользователей}}.
+    Матрица разреженная и считается в базе одним GROUP BY.
+    """
+    rows = defaultdict(dict)
+    pairs = Favorite.objects.annotate(
+        source=F('user__favorites__recipe')
+    ).filter(source__in=recipe_ids).exclude(
+        recipe=F('source')
+    ).order_by().values('source', 'recipe').annotate(total=Count('user'))
+    for pair in pairs.iterator():
+        rows[pair['source']][pair['recipe']] = pair['total']
+    return rows
+
+
+def nearest(row, favorites, source, top_k):
+    """
+    top_k соседей по косинусной мере co / sqrt(n_i * n_j).
+    """
+    scores = (
+        (together / math.sqrt(favorites[source] * favorites[similar]),
+         similar)
+        for similar, together in row.items()
+        if favorites[source] and favorites[similar]
+    )
+    return heapq.nlargest(top_k, scores)
+
+
+def _build_batch(recipe_ids, computed_at, top_k):
+    rows = co_favorites(recipe_ids)
+    neighbor_ids = set(recipe_ids).union(*map(set, rows.values()))
+    favorites = dict(Recipe.objects.filter(
+        id__in=neighbor_ids
+    ).values_list('id', 'favorites_count'))
+    similarities = [
+        RecipeSimilarity(recipe_id=source, similar_id=similar, score=score)
+        for source in recipe_ids if source in favorites
+        for score, similar in nearest(
+            rows.get(source, {}), favorites, source, top_k
+        )
+    ]
+    with transaction.atomic():
+        RecipeSimilarity.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeSimilarity.objects.bulk_create(similarities)
+        SimilarityState.objects.filter(recipe_id__in=recipe_ids).delete()
+        SimilarityState.objects.bulk_create(
+            SimilarityState(
+                recipe_id=recipe_id, favorites=favorites[recipe_id],
+                computed_at=computed_at
+            )
+            for recipe_id in recipe_ids if recipe_id in favorites
+        )
+
+
+def stale_recipes(watermark):
+    """
+    Рецепты, соседи которых могли измениться после watermark:
+    с новыми или удаленными добавлениями в избранное, рецепты тех же
+    пользователей (изменилось совместное число) и рецепты, у которых
+    измененный рецепт уже есть среди соседей (изменилась норма).
+    """
+    added = Favorite.objects.filter(created_at__gt=watermark)
+    changed = set(added.values_list('recipe_id', flat=True))
+    changed.update(SimilarityState.objects.exclude(
+        favorites=F('recipe__favorites_count')
+    ).values_list('recipe_id', flat=True))
+    changed.update(Recipe.objects.filter(
+        favorites_count__gt=0, similarity_state__isnull=True
+    ).values_list('id', flat=True))
+    stale = set(changed)
+    stale.update(Favorite.objects.filter(
+        user__in=added.values('user')
+    ).values_list('recipe_id', flat=True))
+    stale.update(RecipeSimilarity.objects.filter(
+        similar__in=changed
+    ).values_list('recipe_id', flat=True))
+    return sorted(stale)
+
+
+def build_similarities(full=False, batch_size=500):
+    """
+    Пересчитывает похожие рецепты. Без full пересчитываются только
+    рецепты, затронутые изменениями избранного после прошлого запуска.
+    """
+    computed_at = timezone.now()
+    watermark = SimilarityState.objects.aggregate(
+        watermark=Max('computed_at')
+    )['watermark']
+    if full or watermark is None:
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    else:
+        recipe_ids = stale_recipes(watermark)
+    for start in range(0, len(recipe_ids), batch_size):
+        _build_batch(
+            recipe_ids[start:start + batch_size], computed_at,
+            settings.RECOMMENDATIONS_TOP_K
+        )
+    return len(recipe_ids)
+
+
+def recommended_recipes(user, limit):
+    """
+    id рецептов, похожих на избранное пользователя, по убыванию суммы
+    сходства; рецепты из избранного пропускаются.
+    """
+    return list(RecipeSimilarity.objects.filter(
+        recipe__favorites__user=user
+    ).exclude(
+        similar__favorites__user=user
+    ).order_by().values('similar').annotate(
+        total=Sum('score')
+    ).order_by('-total', '-similar').values_list('similar', flat=True)[:limit])
@@ -0,0 +1,74 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag, TagRecipe
+from users.models import User
+
+RECIPES_TOTAL = 120
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def users(db):
+    return [
+        User.objects.create_user(
+            email=f'user{number}@foodgram.ru', username=f'user{number}',
+            first_name='Имя', last_name='Фамилия', password='Pa55word!'
+        )
+        for number in range(3)
+    ]
+
+
+@pytest.fixture
+def recipes(users):
+    tags = [
+        Tag.objects.create(
+            name=f'Тег {number}', color=f'#00000{number}', slug=f'tag{number}'
+        )
+        for number in range(3)
+    ]
+    ingredients = [
+        Ingredient.objects.create(
+            name=f'Ингредиент {number}', measurement_unit='г'
+        )
+        for number in range(5)
+    ]
+    recipes = [
+        Recipe.objects.create(
+            author=users[number % len(users)], name=f'Рецепт {number}',
+            text='Описание', cooking_time=10, image='recipes/image.png'
+        )
+        for number in range(RECIPES_TOTAL)
+    ]
+    TagRecipe.objects.bulk_create(
+        TagRecipe(recipe=recipe, tag=tag)
+        for number, recipe in enumerate(recipes)
+        for tag in tags[:1 + number % len(tags)]
+    )
+    IngredientRecipe.objects.bulk_create(
+        IngredientRecipe(recipe=recipe, ingredient=ingredient, amount=amount)
+        for number, recipe in enumerate(recipes)
+        for amount, ingredient in enumerate(
+            ingredients[:1 + number % len(ingredients)], start=1
+        )
+    )
+    return recipes
+
+
+@pytest.fixture
+def client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(users):
+    client = APIClient()
+    client.force_authenticate(users[0])
+    return client
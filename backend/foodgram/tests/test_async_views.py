@@ -0,0 +1,93 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client, override_settings
+from django.urls import include, path
+from rest_framework.authtoken.models import Token
+
+from api.urls import async_urlpatterns
+from users.models import Subscribe
+
+urlpatterns = [
+    path('api/', include(async_urlpatterns)),
+    path('', include('foodgram.urls')),
+]
+
+
+def fetch_sync(url, token=None, **headers):
+    if token:
+        headers['HTTP_AUTHORIZATION'] = f'Token {token}'
+    return Client().get(url, **headers)
+
+
+def fetch_async(url, token=None, **headers):
+    headers = {
+        key[len('HTTP_'):].replace('_', '-'): value
+        for key, value in headers.items()
+    }
+    if token:
+        headers['authorization'] = f'Token {token}'
+
+    async def get():
+        return await AsyncClient().get(url, **headers)
+
+    with override_settings(ROOT_URLCONF=__name__):
+        return async_to_sync(get)()
+
+
+def assert_same(url, token=None, **headers):
+    expected = fetch_sync(url, token, **headers)
+    response = fetch_async(url, token, **headers)
+    assert response.status_code == expected.status_code
+    assert response.content == expected.content
+    for header in ('Content-Type', 'ETag', 'WWW-Authenticate'):
+        assert response.get(header) == expected.get(header)
+    return response
+
+
+@pytest.fixture
+def token(transactional_db, users, recipes):
+    Subscribe.objects.create(user=users[0], author=users[1])
+    return Token.objects.create(user=users[0]).key
+
+
+@pytest.mark.parametrize('url', [
+    '/api/recipes/?limit=6',
+    '/api/recipes/?limit=6&page=2',
+    '/api/recipes/?limit=6&pagination=cursor',
+    '/api/recipes/?tags=tag1&tags=tag2&ordering=popular',
+    '/api/recipes/?ingredients=abc',
+    '/api/recipes/?page=1000',
+    '/api/tags/',
+    '/api/ingredients/?name=Инг',
+    '/api/ingredients/?name=Инг&limit=-1',
+    '/api/users/subscriptions/?recipes_limit=1',
+    '/api/users/subscriptions/?recipes_limit=x',
+])
+@pytest.mark.parametrize('authenticated', [False, True])
+def test_async_views_match_sync_views(token, url, authenticated):
+    assert_same(url, token if authenticated else None)
+
+
+def test_async_detail_views_match_sync_views(token, recipes):
+    for url in (
+        f'/api/recipes/{recipes[0].pk}/', '/api/recipes/999999/',
+        f'/api/tags/{recipes[0].tags.first().pk}/',
+        f'/api/ingredients/{recipes[0].ingredients.first().pk}/',
+    ):
+        assert_same(url)
+        assert_same(url, token)
+
+
+def test_async_views_use_viewset_permissions(token):
+    response = assert_same('/api/users/subscriptions/')
+    assert response.status_code == 401
+    response = assert_same('/api/recipes/?limit=6', 'invalid')
+    assert response.status_code == 401
+
+
+def test_async_views_answer_conditional_requests(token):
+    etag = fetch_sync('/api/recipes/?limit=6', token)['ETag']
+    response = assert_same(
+        '/api/recipes/?limit=6', token, HTTP_IF_NONE_MATCH=etag
+    )
+    assert response.status_code == 304
@@ -0,0 +1,69 @@
+import pytest
+
+from recipes.models import Tag
+
+URL = '/api/recipes/'
+SINCE = 'Fri, 01 Jan 2100 00:00:00 GMT'
+
+
+def etag_of(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert 'Last-Modified' not in response
+    return response['ETag']
+
+
+@pytest.mark.parametrize('client_name', ['client', 'user_client'])
+def test_unchanged_list_is_not_modified_without_queries(
+    request, django_assert_num_queries, recipes, client_name
+):
+    client = request.getfixturevalue(client_name)
+    etag = etag_of(client, URL)
+
+    with django_assert_num_queries(0):
+        response = client.get(URL, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+
+
+def test_if_modified_since_alone_is_ignored(client, recipes):
+    etag_of(client, URL)
+
+    response = client.get(URL, HTTP_IF_MODIFIED_SINCE=SINCE)
+
+    assert response.status_code == 200
+
+
+def test_deleting_older_recipe_changes_list(
+    client, django_capture_on_commit_callbacks, recipes
+):
+    etag = etag_of(client, URL)
+    with django_capture_on_commit_callbacks(execute=True):
+        recipes[0].delete()
+
+    response = client.get(
+        URL, HTTP_IF_NONE_MATCH=etag, HTTP_IF_MODIFIED_SINCE=SINCE
+    )
+
+    assert response.status_code == 200
+    assert response.json()['count'] == len(recipes) - 1
+
+
+def test_renaming_tag_changes_detail(
+    client, django_capture_on_commit_callbacks, recipes
+):
+    url = f'{URL}{recipes[0].pk}/'
+    etag = etag_of(client, url)
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    tag = Tag.objects.get(slug='tag0')
+    tag.name = 'Завтрак'
+    with django_capture_on_commit_callbacks(execute=True):
+        tag.save()
+
+    response = client.get(
+        url, HTTP_IF_NONE_MATCH=etag, HTTP_IF_MODIFIED_SINCE=SINCE
+    )
+
+    assert response.status_code == 200
+    assert response.json()['tags'][0]['name'] == 'Завтрак'
@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.counters import update_counter
+from users.models import Subscribe, User
+
+
+def counters(recipe, author):
+    recipe.refresh_from_db()
+    author.refresh_from_db()
+    return (
+        recipe.favorites_count, recipe.shopping_cart_count,
+        author.recipes_count, author.followers_count
+    )
+
+
+def test_signals_increment_and_decrement_counters(users, recipes):
+    recipe, author = recipes[0], recipes[0].author
+    recipes_count = Recipe.objects.filter(author=author).count()
+    assert counters(recipe, author) == (0, 0, recipes_count, 0)
+
+    favorite = Favorite.objects.create(user=users[1], recipe=recipe)
+    Favorite.objects.create(user=users[2], recipe=recipe)
+    cart = ShoppingCart.objects.create(user=users[1], recipe=recipe)
+    subscribe = Subscribe.objects.create(user=users[1], author=author)
+    new_recipe = Recipe.objects.create(
+        author=author, name='Новый', text='Описание', cooking_time=1,
+        image='recipes/image.png'
+    )
+    assert counters(recipe, author) == (2, 1, recipes_count + 1, 1)
+
+    favorite.delete()
+    cart.delete()
+    subscribe.delete()
+    new_recipe.delete()
+    assert counters(recipe, author) == (1, 0, recipes_count, 0)
+
+
+def test_update_counter_does_not_go_below_zero(recipes):
+    recipe = recipes[0]
+    update_counter(Recipe, recipe.pk, 'favorites_count', -1)
+    recipe.refresh_from_db()
+    assert recipe.favorites_count == 0
+
+
+def test_recount_matches_real_counts(users, recipes):
+    Favorite.objects.create(user=users[1], recipe=recipes[0])
+    ShoppingCart.objects.create(user=users[2], recipe=recipes[1])
+    Subscribe.objects.create(user=users[1], author=users[0])
+    Recipe.objects.update(favorites_count=7, shopping_cart_count=7)
+    User.objects.update(recipes_count=0, followers_count=5)
+
+    call_command('recount', stdout=StringIO())
+
+    for recipe in Recipe.objects.all():
+        assert recipe.favorites_count == Favorite.objects.filter(
+            recipe=recipe
+        ).count()
+        assert recipe.shopping_cart_count == ShoppingCart.objects.filter(
+            recipe=recipe
+        ).count()
+    for user in User.objects.all():
+        assert user.recipes_count == Recipe.objects.filter(
+            author=user
+        ).count()
+        assert user.followers_count == Subscribe.objects.filter(
+            author=user
+        ).count()
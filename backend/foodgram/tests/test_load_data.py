@@ -0,0 +1,37 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db.models import QuerySet
+
+from recipes.models import Ingredient
+
+ROWS = 'соль,г\nсахар,г\nсоль,г\nмолоко,мл\n'
+
+
+def load(path, **options):
+    out = StringIO()
+    call_command('load_data', str(path), stdout=out, **options)
+    return out.getvalue()
+
+
+def test_load_data_is_idempotent(db, tmp_path):
+    path = tmp_path / 'ingredients.csv'
+    path.write_text(ROWS, encoding='utf-8')
+
+    assert 'Добавлено 3, пропущено 1' in load(path)
+    assert 'Добавлено 0, пропущено 4' in load(path)
+    assert Ingredient.objects.count() == 3
+
+
+def test_load_data_counts_rows_skipped_on_conflict(db, tmp_path):
+    path = tmp_path / 'ingredients.csv'
+    path.write_text(ROWS, encoding='utf-8')
+    load(path)
+    # Строки, добавленные параллельной загрузкой между проверкой
+    # и вставкой, пропускаются через ignore_conflicts.
+    with mock.patch.object(QuerySet, 'values_list', return_value=[]):
+        output = load(path)
+
+    assert 'Добавлено 0, пропущено 4' in output
+    assert Ingredient.objects.count() == 3
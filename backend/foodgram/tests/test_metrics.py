@@ -0,0 +1,54 @@
+import re
+
+import pytest
+from django.urls import include, path
+from rest_framework.test import APIClient
+
+from api.metrics import endpoint_stats
+from api.urls import async_urlpatterns
+
+URL = '/api/recipes/?limit=6'
+TIMING = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) queries")?')
+
+urlpatterns = [
+    path('api/', include(async_urlpatterns)),
+    path('', include('foodgram.urls')),
+]
+
+
+def timings(response):
+    return {
+        name: (float(duration), queries)
+        for name, duration, queries in TIMING.findall(
+            response['Server-Timing']
+        )
+    }
+
+
+@pytest.fixture
+def metrics(settings):
+    settings.API_METRICS = True
+
+
+def test_server_timing_measures_queries_and_serialization(
+    metrics, recipes
+):
+    response = APIClient().get(URL)
+
+    timing = timings(response)
+    assert set(timing) == {'db', 'view', 'serialize', 'total'}
+    assert int(timing['db'][1]) > 0
+    assert timing['serialize'][0] > 0
+
+
+@pytest.mark.urls(__name__)
+def test_queries_in_pool_threads_are_recorded(
+    metrics, transactional_db, recipes
+):
+    endpoint_stats.reset()
+    response = APIClient().get(URL)
+
+    timing = timings(response)
+    assert int(timing['db'][1]) > 0
+    assert timing['serialize'][0] > 0
+    assert list(endpoint_stats.summary()) == ['GET async-recipes-list']
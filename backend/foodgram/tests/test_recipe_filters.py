@@ -0,0 +1,76 @@
+import pytest
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+
+URL = '/api/recipes/'
+
+
+@pytest.fixture
+def pantry(users):
+    ingredients = [
+        Ingredient.objects.create(name=name, measurement_unit='г')
+        for name in ('Горох', 'Морковь', 'Крупа', 'Соль')
+    ]
+    recipes = {}
+    for name, text, used in (
+        ('Суп', 'суп суп суп', (0, 1)),
+        ('Суп гороховый', 'Описание', (0, 1)),
+        ('Каша', 'Описание', (0, 1, 2, 3)),
+        ('Суп овощной', 'Описание', (0, 2, 3)),
+    ):
+        recipe = Recipe.objects.create(
+            author=users[0], name=name, text=text, cooking_time=10,
+            image='recipes/image.png'
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe=recipe, ingredient=ingredients[index], amount=1
+            )
+            for index in used
+        )
+        recipes[name] = recipe
+    return ingredients, recipes
+
+
+def names(client, query):
+    response = client.get(f'{URL}?{query}')
+    assert response.status_code == 200
+    return [recipe['name'] for recipe in response.json()['results']]
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('match=any', {'Суп', 'Суп гороховый', 'Каша', 'Суп овощной'}),
+    ('match=all', {'Суп', 'Суп гороховый', 'Каша'}),
+    ('match=ratio', {'Суп', 'Суп гороховый', 'Каша'}),
+    ('match=ratio&min_ratio=0.75', {'Суп', 'Суп гороховый'}),
+    ('match=ratio&min_ratio=0.3', {
+        'Суп', 'Суп гороховый', 'Каша', 'Суп овощной'
+    }),
+])
+def test_ingredient_match_modes(client, pantry, query, expected):
+    ingredients, _ = pantry
+    ids = ','.join(str(ingredient.id) for ingredient in ingredients[:2])
+
+    assert set(names(client, f'ingredients={ids}&{query}')) == expected
+
+
+def test_min_ratio_is_validated(client, pantry):
+    ingredients, _ = pantry
+
+    response = client.get(
+        f'{URL}?ingredients={ingredients[0].id}&match=ratio&min_ratio=2'
+    )
+
+    assert response.status_code == 400
+
+
+def test_search_relevance_breaks_ingredient_match_ties(client, pantry):
+    ingredients, _ = pantry
+    ids = ','.join(str(ingredient.id) for ingredient in ingredients[:2])
+
+    assert names(client, 'search=суп') == [
+        'Суп', 'Суп овощной', 'Суп гороховый'
+    ]
+    assert names(client, f'search=суп&ingredients={ids}') == [
+        'Суп', 'Суп гороховый', 'Суп овощной'
+    ]
@@ -0,0 +1,24 @@
+import pytest
+
+from recipes.models import Recipe
+
+ORIGINAL = 'http://testserver/media/recipes/image.png'
+
+
+@pytest.mark.parametrize('compiled', [False, True])
+def test_image_is_original_and_renditions_are_separate(
+    client, settings, recipes, compiled
+):
+    settings.API_COMPILED_SERIALIZERS = compiled
+    recipe = recipes[0]
+    response = client.get(f'/api/recipes/{recipe.pk}/')
+    assert response.json()['image'] == ORIGINAL
+    assert response.json()['renditions'] is None
+
+    Recipe.objects.filter(pk=recipe.pk).update(renditions_ready=True)
+    data = client.get(f'/api/recipes/{recipe.pk}/').json()
+    assert data['image'] == ORIGINAL
+    assert set(data['renditions']) == {'thumbnail', 'medium'}
+    assert data['renditions']['thumbnail']['jpeg'].endswith(
+        'recipes/renditions/image_thumbnail.jpeg'
+    )
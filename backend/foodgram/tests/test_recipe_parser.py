@@ -0,0 +1,102 @@
+import base64
+import io
+import json
+from unittest import mock
+
+import pytest
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from rest_framework.exceptions import ParseError
+
+from api.parsers import RecipeJSONParser, RequestEntityTooLarge
+
+URL = '/api/recipes/'
+# Байты, base64 которых содержит символы «/».
+PAYLOAD = bytes(range(256)) * 4
+
+
+def parse(body):
+    return RecipeJSONParser().parse(io.BytesIO(body))
+
+
+def image_body(data, **fields):
+    encoded = base64.b64encode(data).decode()
+    return json.dumps({'image': encoded, **fields}).encode()
+
+
+def test_escaped_slashes_are_decoded():
+    body = image_body(PAYLOAD, name='Суп').replace(b'/', b'\\/')
+    assert b'\\/' in body
+
+    data = parse(body)
+
+    assert data['name'] == 'Суп'
+    assert data['image'].read() == PAYLOAD
+    data['image'].close()
+
+
+def test_data_url_header_is_skipped():
+    encoded = base64.b64encode(PAYLOAD).decode()
+    data = parse(json.dumps({
+        'image': f'data:image/png;base64,{encoded}'
+    }).encode())
+
+    assert data['image'].read() == PAYLOAD
+    data['image'].close()
+
+
+def test_oversized_image_is_rejected(settings):
+    settings.RECIPE_IMAGE_MAX_SIZE = len(PAYLOAD) - 1
+
+    with mock.patch.object(
+        TemporaryUploadedFile, 'close', autospec=True
+    ) as close, pytest.raises(RequestEntityTooLarge):
+        parse(image_body(PAYLOAD))
+
+    close.assert_called_once()
+
+
+def test_oversized_request_is_rejected_by_content_length(user_client):
+    response = user_client.post(
+        URL, data=b'{}', content_type='application/json',
+        CONTENT_LENGTH=str(100 * 1024 * 1024)
+    )
+
+    assert response.status_code == 413
+
+
+def test_unlimited_document_size_is_supported(settings, user_client):
+    settings.DATA_UPLOAD_MAX_MEMORY_SIZE = None
+
+    assert parse(image_body(PAYLOAD))['image'].size == len(PAYLOAD)
+    response = user_client.post(URL, data={}, format='json')
+    assert response.status_code == 400
+
+
+def test_truncated_image_string_is_parse_error():
+    with pytest.raises(ParseError):
+        parse(b'{"image": "AAAA')
+
+
+def test_non_dict_body_is_returned_and_rejected(user_client):
+    assert parse(b'[1, 2]') == [1, 2]
+
+    response = user_client.post(URL, data=[1, 2], format='json')
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('body', [
+    image_body(b'not an image', name='Суп'),
+    '{"image": "@@@@", "name": "Суп"}'.encode(),
+])
+def test_invalid_image_file_is_closed(user_client, body):
+    with mock.patch.object(
+        TemporaryUploadedFile, 'close', autospec=True
+    ) as close:
+        response = user_client.post(
+            URL, data=body, content_type='application/json'
+        )
+
+    assert response.status_code == 400
+    assert 'image' in response.json()
+    close.assert_called_once()
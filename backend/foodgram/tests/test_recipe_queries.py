@@ -0,0 +1,49 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscribe
+
+URL = '/api/recipes/'
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context), response.json()['results']
+
+
+@pytest.mark.parametrize('compiled', [False, True])
+@pytest.mark.parametrize('query', ['', '&pagination=cursor'])
+@pytest.mark.parametrize('client_name', ['client', 'user_client'])
+def test_recipe_list_queries_do_not_depend_on_page_size(
+    request, settings, users, recipes, client_name, query, compiled
+):
+    settings.API_COMPILED_SERIALIZERS = compiled
+    Favorite.objects.create(user=users[0], recipe=recipes[0])
+    ShoppingCart.objects.create(user=users[0], recipe=recipes[1])
+    Subscribe.objects.create(user=users[0], author=users[1])
+    client = request.getfixturevalue(client_name)
+
+    small, small_page = count_queries(client, f'{URL}?limit=6{query}')
+    large, large_page = count_queries(client, f'{URL}?limit=100{query}')
+
+    assert len(small_page) == 6
+    assert len(large_page) == 100 < len(recipes)
+    assert small == large
+
+
+@pytest.mark.parametrize('client_name', ['client', 'user_client'])
+def test_recipe_detail_queries_do_not_depend_on_related_rows(
+    request, recipes, client_name
+):
+    client = request.getfixturevalue(client_name)
+    counts = set()
+    for recipe in recipes[:5]:
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{URL}{recipe.pk}/')
+        assert response.status_code == 200
+        counts.add(len(context))
+    assert len(counts) == 1
@@ -0,0 +1,88 @@
+import pytest
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag
+
+URL = '/api/recipes/?limit=1'
+FEED_URL = '/api/recipes/feed/?limit=1'
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def first_recipe(client, url=URL):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.json()['results'][0]
+
+
+def test_list_is_cached_until_a_signal_bumps_generation(client, recipes):
+    recipe = recipes[-1]
+    assert first_recipe(client)['name'] == recipe.name
+
+    Recipe.objects.filter(pk=recipe.pk).update(name='Без сигнала')
+    assert first_recipe(client)['name'] == recipe.name
+
+    recipe.refresh_from_db()
+    recipe.name = 'Новое название'
+    recipe.save()
+    assert first_recipe(client)['name'] == 'Новое название'
+
+
+def test_tag_change_invalidates_cached_list(client, recipes):
+    tag = Tag.objects.get(slug='tag0')
+    assert first_recipe(client)['tags'][0]['name'] == tag.name
+    assert client.get('/api/tags/').json()[0]['name'] == tag.name
+
+    tag.name = 'Завтрак'
+    tag.save()
+
+    assert first_recipe(client)['tags'][0]['name'] == 'Завтрак'
+    assert client.get('/api/tags/').json()[0]['name'] == 'Завтрак'
+
+
+def test_ingredient_change_invalidates_cached_list(client, recipes):
+    ingredient = Ingredient.objects.get(name='Ингредиент 0')
+    names = {item['name'] for item in first_recipe(client)['ingredients']}
+    assert ingredient.name in names
+
+    ingredient.name = 'Мука'
+    ingredient.save()
+
+    names = {item['name'] for item in first_recipe(client)['ingredients']}
+    assert 'Мука' in names
+    assert client.get('/api/ingredients/?name=Мук').json()[0]['name'] == (
+        'Мука'
+    )
+
+
+def test_recipe_ingredient_change_invalidates_cached_list(client, recipes):
+    link = IngredientRecipe.objects.filter(recipe=recipes[-1]).first()
+    amounts = {
+        item['id']: item['amount']
+        for item in first_recipe(client)['ingredients']
+    }
+    assert amounts[link.ingredient_id] == link.amount
+
+    link.amount = 999
+    link.save()
+
+    amounts = {
+        item['id']: item['amount']
+        for item in first_recipe(client)['ingredients']
+    }
+    assert amounts[link.ingredient_id] == 999
+
+
+def test_feed_cache_is_invalidated_by_subscribe(users, recipes, user_client):
+    user_client.post(f'/api/users/{users[1].pk}/subscribe/')
+    recipe = first_recipe(user_client, FEED_URL)
+    assert recipe['author']['id'] == users[1].pk
+
+    Recipe.objects.filter(pk=recipe['id']).update(name='Без сигнала')
+    assert first_recipe(user_client, FEED_URL)['name'] == recipe['name']
+
+    response = user_client.post(f'/api/users/{users[2].pk}/subscribe/')
+    assert response.status_code == 201
+
+    assert first_recipe(user_client, FEED_URL)['author']['id'] == (
+        users[2].pk
+    )
@@ -0,0 +1,77 @@
+import csv
+import re
+from io import StringIO
+
+import pytest
+
+from recipes.models import ShoppingCart
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+@pytest.fixture
+def cart(users, recipes):
+    for recipe in recipes[:3]:
+        ShoppingCart.objects.create(user=users[0], recipe=recipe)
+
+
+def download(client, file_format):
+    response = client.get(URL, {'format': file_format})
+    assert response.status_code == 200
+    return response, b''.join(response.streaming_content)
+
+
+@pytest.mark.parametrize('file_format, content_type', [
+    ('txt', 'text/plain; charset=utf-8'),
+    ('csv', 'text/csv; charset=utf-8'),
+    ('pdf', 'application/pdf'),
+])
+def test_export_content_type(user_client, cart, file_format, content_type):
+    response, _ = download(user_client, file_format)
+    assert response['Content-Type'] == content_type
+    assert response['Content-Disposition'] == (
+        f'attachment; filename="shopping_list.{file_format}"'
+    )
+
+
+def test_unknown_format_is_rejected(user_client, cart):
+    response = user_client.get(URL, {'format': 'xml'})
+    assert response.status_code == 400
+    assert response['Content-Type'] == 'application/json'
+    assert 'format' in response.json()
+
+
+def test_export_requires_authentication(client):
+    assert client.get(URL).status_code == 401
+
+
+def test_txt_export(user_client, cart):
+    _, content = download(user_client, 'txt')
+    lines = content.decode().splitlines()
+    assert lines[0] == 'Список покупок:'
+    assert lines[1] == 'Позиция №1: Ингредиент 0 - 3 г'
+    assert lines[2] == 'Позиция №2: Ингредиент 1 - 4 г'
+
+
+def test_csv_export(user_client, cart):
+    _, content = download(user_client, 'csv')
+    rows = list(csv.reader(StringIO(content.decode())))
+    assert rows[0] == ['Ингредиент', 'Количество', 'Единица измерения']
+    assert rows[1:] == [
+        ['Ингредиент 0', '3', 'г'],
+        ['Ингредиент 1', '4', 'г'],
+        ['Ингредиент 2', '3', 'г'],
+    ]
+
+
+def test_pdf_export(user_client, cart):
+    _, content = download(user_client, 'pdf')
+    assert content.startswith(b'%PDF-1.4')
+    assert content.endswith(b'%%EOF\n')
+    assert '(Позиция №1: Ингредиент 0 - 3 г)'.encode('cp1251') in content
+    assert b'/afii10017' in content
+    startxref = int(re.search(rb'startxref\n(\d+)', content).group(1))
+    assert content[startxref:].startswith(b'xref\n')
+    offsets = re.findall(rb'(\d{10}) 00000 n ', content[startxref:])
+    for number, offset in enumerate(offsets, start=1):
+        assert content[int(offset):].startswith(b'%d 0 obj' % number)
@@ -0,0 +1,25 @@
+import pytest
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.serializers import MySubscriptionSerializer
+
+
+def subscription_data(user, author, query):
+    request = APIRequestFactory().get('/api/users/subscriptions/', query)
+    force_authenticate(request, user)
+    request = Request(request)
+    return MySubscriptionSerializer(
+        author, context={'request': request}
+    ).data
+
+
+def test_recipes_limit_without_prefetch(users, recipes):
+    data = subscription_data(users[0], users[1], {'recipes_limit': 2})
+    assert len(data['recipes']) == 2
+
+
+def test_invalid_recipes_limit_without_prefetch(users, recipes):
+    with pytest.raises(ValidationError):
+        subscription_data(users[0], users[1], {'recipes_limit': 'abc'})
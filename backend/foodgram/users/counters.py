@@ -0,0 +1,12 @@
+from django.db.models import F
+
+
+def update_counter(model, pk, field, delta):
+    """
+    Атомарно меняет счетчик в строке модели выражением F(),
+    не опуская его ниже нуля.
+    """
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
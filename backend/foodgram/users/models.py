@@ -16,6 +16,12 @@ class User(AbstractUser):
     last_name = models.CharField(
         'Фамилия', max_length=settings.CHARFIELD_150
     )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов', default=0, editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков', default=0, editable=False
+    )
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name')
 
@@ -55,6 +61,11 @@ class Subscribe(models.Model):
                 name='prevent_self_follow'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='subscribe_author_user_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'Пользователь {self.user}, автор {self.author}'
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.counters import update_counter
+from users.models import Subscribe, User
+
+
+@receiver(post_save, sender=Subscribe)
+def add_follower(sender, instance, created, **kwargs):
+    if created:
+        update_counter(User, instance.author_id, 'followers_count', 1)
+
+
+@receiver(post_delete, sender=Subscribe)
+def remove_follower(sender, instance, **kwargs):
+    update_counter(User, instance.author_id, 'followers_count', -1)